@@ -0,0 +1,44 @@
+"""
+Persistent address -> (city, state) cache (SQLite). Chain businesses and repeat scrapes keep producing the same
+addresses, so each one only goes through the usaddress CRF parser once, ever.
+"""
+
+from lazy_sqlite import LazyConnection
+import threading
+
+CACHE_PATH = 'cache/addresses.db'
+
+
+class AddressCache:
+    def __init__(self, path=CACHE_PATH):
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.db = LazyConnection(path, 'CREATE TABLE IF NOT EXISTS addresses (address TEXT PRIMARY KEY, city TEXT, state TEXT)')
+
+    @property
+    def conn(self):
+        return self.db.get()
+
+    def __str__(self):
+        return f'\nAddress cache: {self.hits} hits / {self.misses} misses'
+
+    def get_many(self, addresses):
+        """{address: (city, state)} for every address already parsed. looked up in batches of 500"""
+        addresses = list(addresses)
+        found = {}
+        with self.lock:
+            for i in range(0, len(addresses), 500):
+                batch = addresses[i:i+500]
+                query = f'SELECT address, city, state FROM addresses WHERE address IN ({",".join("?"*len(batch))})'
+                for address, city, state in self.conn.execute(query, batch):
+                    found[address] = (city, state)
+            self.hits += len(found)
+            self.misses += len(addresses) - len(found)
+        return found
+
+    def put_many(self, parsed):
+        """stores {address: (city, state)}"""
+        with self.lock, self.conn:
+            self.conn.executemany('INSERT OR REPLACE INTO addresses VALUES (?, ?, ?)',
+                                  [(address, city, state) for address, (city, state) in parsed.items()])
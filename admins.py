@@ -9,8 +9,17 @@ import pyinputplus as pyip
 import numpy as np
 from pprint import pprint as pr
 import usaddress
-import random
 import math
+import heapq
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from tqdm import tqdm
+from address_cache import AddressCache
+from geo_index import get_geo_index
+import config
+
+ADDRESS_CACHE = AddressCache()
+DAILY_SEND_CAP = getattr(config, 'DAILY_SEND_CAP', 50) # default emails/day per admin mailbox, if admin_info.csv has no daily_send_cap column
 
 # class instantiation and type checking via Pydantic
 class Admin(BaseModel):
@@ -18,9 +27,14 @@ class Admin(BaseModel):
     last_name: str
     slug: str
     email: str
-    city: str or None
-    state: str or None
+    city: str | None = None
+    state: str | None = None
     store_code: str
+    daily_send_cap: int | None = None # falls back to DAILY_SEND_CAP
+
+    @property
+    def send_cap(self):
+        return self.daily_send_cap or DAILY_SEND_CAP
 
 class Account(BaseModel):
     """an 'account' here represents a lead and it's data + admin assignment"""
@@ -49,66 +63,173 @@ def get_admins(exclude_RM=False) -> list[Admin]:
         esl_list = [x.strip().upper() for x in esl_list]
         df.query('store_code not in @esl_list',inplace=True)
     
-    return [Admin(**row) for i,row in df.iterrows()]
+    return [admin_from_row(row) for i,row in df.iterrows()]
 
 def get_admin(email):
     """searches and returns single admin object based on email"""
     df = pd.read_csv('admin_info.csv')
-    row = df.query('email == @email').squeeze().to_dict()
-    return Admin(**row)
+    return admin_from_row(df.query('email == @email').squeeze())
+
+def admin_from_row(row: pd.Series) -> Admin:
+    """Admin from an admin_info.csv row. blank cells (NaN) become None, a blank daily_send_cap the default"""
+    if 'daily_send_cap' in row:
+        row = row.fillna({'daily_send_cap': DAILY_SEND_CAP})
+    row = row.astype(object)
+    return Admin(**row.where(row.notna(), None))
+
+def parse_address(address: str) -> tuple:
+    """(city, state) from a free-text address via the usaddress CRF parser. (None, None) if parsing fails"""
+    try:
+        #formats addresses into Address objects to allow for geographical lead assignment
+        tagged = usaddress.tag(str(address))[0]
+        return tagged.get('PlaceName'), tagged.get('StateName')
+    except Exception:
+        return None, None
+
+def _parse_address_chunk(addresses: list) -> list:
+    return [parse_address(a) for a in addresses]
+
+def parse_addresses(addresses, workers=None, cache=None, chunk_size=500) -> dict:
+    """{address: (city, state)} for each distinct address. addresses ending in a known 'City, ST' or ZIP are resolved
+       from the uscities index; cached addresses skip the parser entirely; the rest are parsed across a process
+       pool (CRF tagging is CPU-bound) and written back to the cache"""
+    cache = cache or ADDRESS_CACHE
+    geo = get_geo_index()
+    parsed = {}
+    unresolved = []
+    for address in dict.fromkeys(addresses):
+        location = geo.resolve(address)
+        if location:
+            parsed[address] = location
+        else:
+            unresolved.append(address)
+    print(f'\nResolved {len(parsed)} addresses from the ZIP/city index, {len(unresolved)} left for the address parser.')
+    parsed.update(cache.get_many(unresolved))
+    to_parse = [a for a in unresolved if a not in parsed]
+    if not to_parse:
+        return parsed
+    chunks = [to_parse[i:i+chunk_size] for i in range(0, len(to_parse), chunk_size)]
+    # only fork-based pools are safe here: spawn (Windows) would re-import the calling script, prompts and all
+    if len(chunks) > 1 and 'fork' in multiprocessing.get_all_start_methods():
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('fork')) as executor:
+            results = list(tqdm(executor.map(_parse_address_chunk, chunks), total=len(chunks), unit='chunk'))
+    else:
+        results = [_parse_address_chunk(chunk) for chunk in chunks]
+    new = dict(zip(to_parse, [r for chunk in results for r in chunk]))
+    cache.put_many(new)
+    parsed.update(new)
+    return parsed
+
+EARTH_RADIUS_KM = 6371.0
+
+def haversine_km(lats, lngs, admin_lats, admin_lngs):
+    """great-circle distance matrix (n accounts x k admins) in km"""
+    lat1, lng1 = np.radians(lats)[:, None], np.radians(lngs)[:, None]
+    lat2, lng2 = np.radians(admin_lats)[None, :], np.radians(admin_lngs)[None, :]
+    a = np.sin((lat2-lat1)/2)**2 + np.cos(lat1)*np.cos(lat2)*np.sin((lng2-lng1)/2)**2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+class AdminLocator:
+    """spatial index over admin locations (uscities lat/lng of each admin's city, or their state's centroid).
+       admin counts are small, so an exact vectorized haversine query in row chunks beats building a tree"""
+    def __init__(self, admins: list[Admin]):
+        geo = get_geo_index()
+        located = [(a, geo.coords(a.city, a.state)) for a in admins]
+        self.admins = [a for a, coords in located if coords]
+        self.positions = [i for i, (_, coords) in enumerate(located) if coords] # index of each located admin in admins
+        self.lats = np.array([coords[0] for _, coords in located if coords])
+        self.lngs = np.array([coords[1] for _, coords in located if coords])
+
+    def k_nearest(self, lats, lngs, k=1, chunk_size=50000):
+        """(admin indexes, distances in km), each n x k, nearest first"""
+        k = min(k, len(self.admins))
+        indexes, distances = [], []
+        for i in range(0, len(lats), chunk_size):
+            d = haversine_km(lats[i:i+chunk_size], lngs[i:i+chunk_size], self.lats, self.lngs)
+            nearest = np.argsort(d, axis=1, kind='stable')[:, :k]
+            indexes.append(nearest)
+            distances.append(np.take_along_axis(d, nearest, axis=1))
+        if not indexes:
+            return np.empty((0, k), dtype=int), np.empty((0, k))
+        return np.vstack(indexes), np.vstack(distances)
+
+def allocate_accounts(points, admins: list[Admin], unlocated=0, candidates=3, max_detour_km=80.0) -> tuple[list[int], list[int]]:
+    """capacity-aware assignment. each located account (points: n x 2 lat/lng) goes to whichever of its nearest
+       `candidates` admins (no more than max_detour_km further than the closest one) has the fewest days of sends
+       queued, given their daily_send_cap. the `unlocated` accounts then go one by one to the admin with the fewest
+       days queued overall, via a min-heap -- O(n log k). ties go to the nearer admin, then alphabetically by name,
+       so the result doesn't depend on the order of admin_info.csv.
+       returns (admin index per located account, admin index per unlocated account), indexes into admins"""
+    caps = [a.send_cap for a in admins]
+    loads = [0] * len(admins)
+    by_name = sorted(range(len(admins)), key=lambda i: (admins[i].last_name, admins[i].first_name, admins[i].email))
+    rank = [0] * len(admins)
+    for r, i in enumerate(by_name):
+        rank[i] = r
+    locator = AdminLocator(admins)
+    located_owners = []
+    if len(points) and locator.admins:
+        near, dist = locator.k_nearest(points[:, 0], points[:, 1], k=candidates)
+        positions = np.array(locator.positions)[near] # n x candidates, indexes into admins
+        in_reach = dist <= dist[:, :1] + max_detour_km
+        for options, reach, km in zip(positions.tolist(), in_reach.tolist(), dist.tolist()):
+            _, _, _, best = min(((loads[o] + 1) / caps[o], d, rank[o], o) for o, ok, d in zip(options, reach, km) if ok)
+            loads[best] += 1
+            located_owners.append(best)
+    elif len(points): # no admin could be placed on the map -- every account is balanced by load alone
+        unlocated += len(points)
+
+    heap = [((loads[i] + 1) / caps[i], rank[i], i) for i in range(len(admins))]
+    heapq.heapify(heap)
+    unlocated_owners = []
+    for _ in range(unlocated):
+        _, _, i = heapq.heappop(heap)
+        loads[i] += 1
+        unlocated_owners.append(i)
+        heapq.heappush(heap, ((loads[i] + 1) / caps[i], rank[i], i))
+    if len(points) and not locator.admins:
+        located_owners, unlocated_owners = unlocated_owners[:len(points)], unlocated_owners[len(points):]
+    return located_owners, unlocated_owners
+
+def print_send_schedule(accounts: list[Account]):
+    """leads per admin and expected days to send them all at their daily cap"""
+    owners = {}
+    for account in accounts:
+        owners.setdefault(account.owner.email, [account.owner, 0])[1] += 1
+    print(f'\n{"Admin":<30}{"Leads":>8}{"Cap/day":>9}{"Days":>6}')
+    for admin, leads in sorted(owners.values(), key=lambda x: x[1] / x[0].send_cap, reverse=True):
+        print(f'{admin.first_name + " " + admin.last_name:<30}{leads:>8}{admin.send_cap:>9}{math.ceil(leads / admin.send_cap):>6}')
+
+def get_accounts(data_frame: str, admins: list[Admin], workers=None) -> list[Account]:
+    has_address = [type(a) == str and bool(a) for a in data_frame['address']]
+    locations = parse_addresses([a for a, ok in zip(data_frame['address'], has_address) if ok], workers=workers)
+    print(ADDRESS_CACHE)
+    cities_states = [locations[a] if ok else (None, None) for a, ok in zip(data_frame['address'], has_address)]
+
+    # coordinates per distinct (city, state), then nearby admins share each account by remaining send capacity
+    geo = get_geo_index()
+    coords = {cs: geo.coords(*cs) for cs in set(cities_states)}
+    located = np.array([coords[cs] is not None for cs in cities_states], dtype=bool)
+    points = np.array([coords[cs] for cs in cities_states if coords[cs] is not None], dtype=float).reshape(-1, 2)
+    located_owners, unlocated_owners = allocate_accounts(points, admins, unlocated=int((~located).sum()))
+    owner_iters = iter(located_owners), iter(unlocated_owners)
+    owners = [admins[next(owner_iters[0] if ok else owner_iters[1])] for ok in located]
+    print(f'\nAssigned {int(located.sum())} of {len(owners)} accounts to nearby admins. The rest went to the least loaded admins.')
 
-def get_accounts(data_frame: str, admins: list[Admin]) -> list[Account]:
     accounts = []
-    #splits dataframe into chunks for memory purposes
-    array_df = np.array_split(data_frame, 1000)
-    for chunk in array_df:
-        for i, row in chunk.iterrows():
-            if row['address']:
-                try:
-                    #formats addresses into Address objects to allow for geographical lead assignment
-                    address = usaddress.tag(str(row['address']))[0]
-                    state = address['StateName'] if 'StateName' in address.keys() else None
-                    city = address['PlaceName'] if 'PlaceName' in address.keys() else None
-                    if city:
-                        city_admins = [x for x in admins if x.city == city] # first looks for any admins in current city
-                        if city_admins:
-                            admin = random.choice(city_admins) # if so assign admin from that city at random
-                        elif state: 
-                            state_admins = [x for x in admins if x.state == state]
-                            if state_admins: # if there are no admins in that city, but are mins in the state, assign
-                                admin = random.choice(state_admins)
-                            else:
-                                admin = random.choice(admins)
-                        else: # this seems redundant...but if not city or state admins, randomly assign from all
-                            admin = random.choice(admins)
-                    elif state:
-                        state_admins = [x for x in admins if x.state == state]
-                        if state_admins:
-                            admin = random.choice(state_admins)
-                        else:
-                            admin = random.choice(admins)
-                    else:
-                        admin = random.choice(admins)
-                except: # if address parsing fails or no address, assign to random admin
-                    admin = random.choice(admins) 
-                    city = None
-                    state = None
-            else:
-                admin = random.choice(admins)
-                city = None
-                state = None
-                
-            accounts.append(
-                Account(
-                    name=row['name'],
-                    domain=row['website'],
-                    address=row['address'],
-                    state=state,
-                    city=city,
-                    category=row['category'],
-                    owner=admin
-                )
+    for row, ok, (city, state), owner in zip(data_frame.itertuples(index=False), has_address, cities_states, owners):
+        accounts.append(
+            Account(
+                name=row.name,
+                domain=row.website,
+                address=row.address if ok else None,
+                state=state,
+                city=city,
+                category=row.category,
+                owner=owner
             )
+        )
+    print_send_schedule(accounts)
     return accounts
 
 
@@ -0,0 +1,229 @@
+"""
+Benchmarks for the slow stages of the Cold Out pipeline. Network-bound stages run against a local fake
+Hunter endpoint (no API credits used). Run directly: python bench.py
+"""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import threading
+import json
+import time
+import os
+
+
+class FakeHunterHandler(BaseHTTPRequestHandler):
+    """mimics the Hunter v2 endpoints we use. every request sleeps `latency` seconds to simulate network time"""
+    latency = 0.2
+    protocol_version = 'HTTP/1.1' # keep-alive, like the real API
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args): # silence per-request logging
+        pass
+
+    def _send(self, status, payload=None):
+        body = json.dumps(payload).encode() if payload is not None else b''
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        time.sleep(self.latency)
+        parsed = urlparse(self.path)
+        query = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+        if parsed.path.endswith('/domain-search'):
+            domain = query.get('domain', 'example.com')
+            self._send(200, {'data': {
+                'domain': domain,
+                'organization': domain.split('.')[0].title(),
+                'pattern': '{first}',
+                'emails': [{
+                    'value': f'{slug}@{domain}',
+                    'type': 'personal',
+                    'confidence': 90,
+                    'sources': [{}],
+                    'first_name': slug.title(),
+                    'last_name': None,
+                    'position': None,
+                    'department': None,
+                    'twitter': None,
+                    'linkedin': None,
+                    'phone_number': None,
+                    'verification': {'status': 'valid', 'date': '2023-01-01'},
+                } for slug in ['jane', 'info']],
+            }})
+        else:
+            self._send(404, {'errors': [{'details': 'not found'}]})
+
+
+class FakeHunterServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128 # default listen backlog of 5 stalls connects at high concurrency
+
+def start_fake_hunter(latency=0.2):
+    """starts fake Hunter server on a free local port in a background thread. returns (server, base_url)"""
+    FakeHunterHandler.latency = latency
+    server = FakeHunterServer(('127.0.0.1', 0), FakeHunterHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_port}/v2/'
+
+
+def fake_accounts(n):
+    from admins import Admin, Account
+    owner = Admin(first_name='Test', last_name='Admin', slug='test', email='test@undergroundshirts.com',
+                  city='Ann Arbor', state='MI', store_code='XX')
+    return [Account(name=f'Business {i}', domain=f'business{i}.com', address=None, state=None, city=None,
+                    category='test', owner=owner) for i in range(n)]
+
+
+def bench_domain_search(num_domains=200, latency=0.2, concurrency=(1, 2, 4, 8, 16, 32)):
+    """throughput of bulk_domain_search as concurrency goes up (limiter set high so only latency matters)"""
+    from hunter_domain_search import bulk_domain_search
+    from rate_limit import RateLimiter
+    os.makedirs('testing_dump', exist_ok=True)
+    server, base_url = start_fake_hunter(latency)
+    accounts = fake_accounts(num_domains)
+    rows = []
+    try:
+        for workers in concurrency:
+            start = time.perf_counter()
+            results = bulk_domain_search(accounts, 'bench', workers=workers, url=base_url + 'domain-search',
+                                         limiter=RateLimiter(per_second=10000), cache=None)
+            elapsed = time.perf_counter() - start
+            assert [r.input_domain for r in results[::2]] == [a.domain for a in accounts] # input order preserved
+            rows.append((workers, elapsed, num_domains/elapsed))
+    finally:
+        server.shutdown()
+    print(f'\nbulk_domain_search: {num_domains} domains, {latency*1000:.0f}ms simulated latency')
+    print(f'{"workers":>8} {"seconds":>8} {"domains/s":>10}')
+    for workers, elapsed, rate in rows:
+        print(f'{workers:>8} {elapsed:>8.2f} {rate:>10.1f}')
+    return rows
+
+
+def synthetic_results_frame(n, leads_per_domain=3, seed=0):
+    """DataFrame shaped like lead_filter.results_frame for n fake domain search results"""
+    import numpy as np
+    import pandas as pd
+    rng = np.random.default_rng(seed)
+    slugs = np.array(['info', 'hello', 'jane', 'john.smith', 'contact', 'sales'])
+    statuses = np.array(['valid', 'accept_all', 'unknown', None], dtype=object)
+    names = np.array(['Jane', 'John', None, ''], dtype=object)
+    domains = pd.Series(rng.integers(0, max(n//leads_per_domain, 1), n)).map('business{}.com'.format)
+    return pd.DataFrame({
+        'domain': domains,
+        'email': pd.Series(slugs[rng.integers(0, len(slugs), n)]) + '@' + domains,
+        'verification_status': statuses[rng.integers(0, len(statuses), n)],
+        'first_name': names[rng.integers(0, len(names), n)],
+    })
+
+
+def legacy_pick_leads(df):
+    """original filter_generics algorithm (rescans every lead for every domain), on plain dicts"""
+    leads = df.to_dict('records')
+    kept = []
+    for domain in set(x['domain'] for x in leads):
+        domain_leads = [x for x in leads if x['domain'] == domain]
+        good = [x for x in domain_leads if x['email'].split('@')[0] not in ["info", "hello", "team", "help", "contact"]
+                and x['verification_status'] in ['valid', 'accept_all'] and x['first_name']]
+        kept.append((good or domain_leads)[0]['email'])
+    return kept
+
+
+def bench_lead_filter(sizes=(10_000, 100_000, 1_000_000), legacy_max=10_000):
+    """lead_filter.pick_leads at 10k/100k/1M synthetic results (legacy algorithm only where it finishes)"""
+    from lead_filter import pick_leads
+    print(f'\n{"results":>10} {"domains":>9} {"pick_leads s":>13} {"legacy s":>9}')
+    rows = []
+    for n in sizes:
+        df = synthetic_results_frame(n)
+        start = time.perf_counter()
+        keep, _ = pick_leads(df)
+        elapsed = time.perf_counter() - start
+        legacy = None
+        if n <= legacy_max:
+            start = time.perf_counter()
+            legacy_emails = legacy_pick_leads(df)
+            legacy = time.perf_counter() - start
+            assert sorted(legacy_emails) == sorted(df['email'].to_numpy()[keep]) # same lead picked for every domain
+        rows.append((n, len(keep), elapsed, legacy))
+        print(f'{n:>10} {len(keep):>9} {elapsed:>13.3f} {f"{legacy:.3f}" if legacy is not None else "-":>9}')
+    return rows
+
+
+# regression corpus for parse_pb.clean_name -- messy Google Maps listing titles, incl. overlapping separators
+NAME_CORPUS = [
+    'Underground Printing', 'Underground Printing (Ann Arbor)', 'Joe\'s Pizza at Main St', 'Beat Shop',
+    'Smith & Co - Dentistry', 'Cafe @ The Park', 'Acme Builders, LLC', 'Acme Builders LLC', 'Acme LLC (Detroit)',
+    'Law Office | Jane Doe', 'Camp Wonder: Summer Programs', 'A - (x', 'A (- B', 'Cats at - Home', 'Hat at @ (x)',
+    'X, LLC | Y: Z - W', 'Trailing space (', ' at start', ':  ', 'a: b (c', 'Dr. Smith DDS at Smile Center - Suite 100',
+    'LLCs R Us', 'Bar-B-Q at the Lake', '', 'Über Café – Ann Arbor', None, float('nan'), 12345,
+]
+
+
+def legacy_clean_name(name):
+    """original parse_pb.clean_name, kept verbatim as the reference for the compiled rules"""
+    if type(name) == str:
+        parenthesis = ' ('
+        new_name = name
+        if parenthesis in str(name):
+            new_name = name.split(parenthesis)[0]
+        if ' at' in str(new_name):
+            new_name = new_name.split(' at')[0]
+        if ' - ' in str(new_name):
+            new_name = new_name.split(' - ')[0]
+        if ' @' in str(new_name):
+            new_name = new_name.split(' @')[0]
+        if ', LLC' in str(new_name):
+            new_name = new_name.split(', LLC')[0]
+        if ' LLC' in str(new_name):
+            new_name = new_name.split(' LLC')[0]
+        if ' | ' in str(new_name):
+            new_name = new_name.split(' | ')[0]
+        if ': ' in new_name:
+            new_name = new_name.split(': ')[0]
+        return new_name
+    else:
+        return name
+
+
+def synthetic_names(n, seed=0):
+    """random business names built from corpus fragments + separators (many repeats, like chain listings)"""
+    import numpy as np
+    import pandas as pd
+    rng = np.random.default_rng(seed)
+    words = np.array(['Acme', 'Joe\'s', 'Pizza', 'Dental', 'Camp', 'Law', 'Smile', 'Builders', 'Cafe', 'Gym', 'Hat'])
+    seps = np.array(['', '', '', ' (', ' at', ' - ', ' @', ', LLC', ' LLC', ' | ', ': ', 'at', '-'])
+    parts = [words[rng.integers(0, len(words), n)], seps[rng.integers(0, len(seps), n)], words[rng.integers(0, len(words), n)],
+             seps[rng.integers(0, len(seps), n)], words[rng.integers(0, len(words), n)]]
+    return pd.Series([' '.join(p) for p in zip(*parts)])
+
+
+def bench_clean_names(sizes=(10_000, 100_000, 1_000_000)):
+    """parse_pb.clean_names vs the original per-row clean_name, checked for identical output"""
+    from parse_pb import clean_name, clean_names
+    for name in NAME_CORPUS:
+        expected = legacy_clean_name(name)
+        assert clean_name(name) == expected or (expected != expected and clean_name(name) != clean_name(name)), name
+    print(f'\nclean_name regression corpus: {len(NAME_CORPUS)} names OK')
+    print(f'{"names":>10} {"clean_names/s":>14} {"legacy/s":>12}')
+    rows = []
+    for n in sizes:
+        names = synthetic_names(n)
+        start = time.perf_counter()
+        cleaned = clean_names(names)
+        elapsed = time.perf_counter() - start
+        start = time.perf_counter()
+        legacy = names.apply(legacy_clean_name)
+        legacy_elapsed = time.perf_counter() - start
+        assert cleaned.equals(legacy)
+        rows.append((n, n/elapsed, n/legacy_elapsed))
+        print(f'{n:>10} {n/elapsed:>14,.0f} {n/legacy_elapsed:>12,.0f}')
+    return rows
+
+
+if __name__ == '__main__':
+    bench_domain_search()
+    bench_lead_filter()
+    bench_clean_names()
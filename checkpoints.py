@@ -0,0 +1,117 @@
+"""
+Checkpointed stages for a Cold Out session. Each stage's output is saved as a typed artifact under
+checkpoints/{TAG}/{stage}.pkl along with a content hash of its inputs. Re-running a session skips any stage whose
+inputs haven't changed and loads its saved output instead, so a crash during verification doesn't mean
+repeating the domain search.
+"""
+
+from pydantic import BaseModel
+import pandas as pd
+import numpy as np
+import hashlib
+import datetime
+import pickle
+import json
+import os
+
+CHECKPOINT_DIR = 'checkpoints'
+
+
+def _canonical(value):
+    """json-able, order-independent form of a stage input. pickles aren't stable across processes (a pydantic
+       model's __fields_set__ is a set, so its order follows the per-process string hash seed)"""
+    if isinstance(value, BaseModel):
+        return {'__model__': type(value).__name__, 'fields': _canonical(value.dict())}
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        try:
+            rows = pd.util.hash_pandas_object(value, index=True).values.tobytes()
+        except TypeError: # unhashable cells (lists, dicts...)
+            rows = value.to_csv().encode()
+        columns = value.columns if isinstance(value, pd.DataFrame) else [value.name]
+        dtypes = value.dtypes if isinstance(value, pd.DataFrame) else [value.dtype]
+        return {'__frame__': [str(c) for c in columns], 'dtypes': [str(d) for d in dtypes], 'rows': hashlib.sha256(rows).hexdigest()}
+    if isinstance(value, dict):
+        return {str(k): _canonical(v) for k, v in value.items()}
+    if isinstance(value, (set, frozenset)):
+        return sorted((_canonical(v) for v in value), key=lambda v: json.dumps(v, sort_keys=True, default=str))
+    if isinstance(value, (list, tuple)):
+        return [_canonical(v) for v in value]
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def content_hash(*values):
+    """sha256 of a canonical json serialization of the values (models as sorted-key dicts, DataFrames by
+       pd.util.hash_pandas_object), so the same inputs hash the same in every process"""
+    digest = hashlib.sha256()
+    for value in values:
+        digest.update(json.dumps(_canonical(value), sort_keys=True, default=str).encode())
+    return digest.hexdigest()
+
+
+def file_hash(path):
+    """sha256 of a file's bytes, for inputs that are file paths (e.g. existing customer CSV)"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class StagePipeline:
+    """runs named stages for one tag, reusing saved output whenever a stage's input hash matches the last run"""
+    def __init__(self, tag, root=CHECKPOINT_DIR):
+        self.tag = tag
+        self.dir = os.path.join(root, tag)
+        os.makedirs(self.dir, exist_ok=True)
+        self.manifest_path = os.path.join(self.dir, 'manifest.json')
+        try:
+            with open(self.manifest_path) as f:
+                self.manifest = json.load(f)
+        except FileNotFoundError:
+            self.manifest = {}
+
+    def _artifact_path(self, stage):
+        return os.path.join(self.dir, f'{stage}.pkl')
+
+    def is_fresh(self, stage, *inputs):
+        """True if stage already ran with these exact inputs and its artifact is intact"""
+        entry = self.manifest.get(stage)
+        path = self._artifact_path(stage)
+        return bool(entry) and entry['input_hash'] == content_hash(*inputs) and os.path.exists(path) and file_hash(path) == entry['output_hash']
+
+    def run(self, stage, func, *inputs):
+        """returns func(*inputs), or the saved output of the last run if the inputs are unchanged"""
+        if self.is_fresh(stage, *inputs):
+            print(f'\nInputs unchanged since {self.manifest[stage]["saved_at"]}. Loading saved {stage} results...')
+            with open(self._artifact_path(stage), 'rb') as f:
+                return pickle.load(f)
+        input_hash = content_hash(*inputs) # hashed before func runs, since some stages mutate their inputs
+        output = func(*inputs)
+        self.save(stage, output, input_hash)
+        return output
+
+    def save(self, stage, output, input_hash):
+        path = self._artifact_path(stage)
+        with open(path + '.tmp', 'wb') as f:
+            pickle.dump(output, f, protocol=4)
+        os.replace(path + '.tmp', path) # atomic, so a crash mid-write never leaves a half artifact
+        self.manifest[stage] = {
+            'input_hash': input_hash,
+            'output_hash': file_hash(path),
+            'saved_at': datetime.datetime.now().isoformat(timespec='seconds'),
+        }
+        with open(self.manifest_path, 'w') as f:
+            json.dump(self.manifest, f, indent=2)
+
+    def clear(self, stage=None):
+        """forget one stage (or all stages) so it runs again next time"""
+        for s in [stage] if stage else list(self.manifest):
+            self.manifest.pop(s, None)
+            if os.path.exists(self._artifact_path(s)):
+                os.remove(self._artifact_path(s))
+        with open(self.manifest_path, 'w') as f:
+            json.dump(self.manifest, f, indent=2)
@@ -0,0 +1,97 @@
+"""
+Columnar copy of uscities.csv (NumPy .npz under cache/) for get_urls. Holds only the columns the URL builder needs,
+plus a population-sorted index and a per-state (state, population)-sorted index, so picking the cities for a
+Net preset is a couple of searchsorted slices instead of a CSV read + four df.query passes.
+Built once and rebuilt automatically if uscities.csv changes.
+"""
+
+import numpy as np
+import pandas as pd
+import os
+
+USCITIES_PATH = 'uscities.csv'
+TABLE_PATH = 'cache/uscities.npz'
+TABLE_VERSION = 1 # bump when the stored columns/indexes change so stale tables get rebuilt
+COLUMNS = ['city', 'state_id', 'state_name', 'lat', 'lng', 'population', 'density']
+
+
+class CityTable:
+    """uscities columns as arrays, in the CSV's original (population rank) order"""
+    def __init__(self, arrays):
+        self.arrays = arrays
+        for column in COLUMNS:
+            setattr(self, column, arrays[column])
+        self.by_population = arrays['by_population'] # row ids sorted by population
+        self.by_state = arrays['by_state'] # row ids sorted by (state_id, population)
+        self.states = arrays['states'] # sorted state ids, with each one's [start, stop) span in by_state
+        self.state_starts = arrays['state_starts']
+        self.state_stops = arrays['state_stops']
+
+    def __len__(self):
+        return len(self.city)
+
+    @classmethod
+    def build(cls, path=USCITIES_PATH):
+        df = pd.read_csv(path, usecols=COLUMNS)
+        arrays = {c: df[c].to_numpy(dtype=str if df[c].dtype == object else None) for c in COLUMNS}
+        arrays['by_population'] = np.argsort(arrays['population'], kind='stable')
+        by_state = np.lexsort((arrays['population'], arrays['state_id']))
+        states, starts, counts = np.unique(arrays['state_id'][by_state], return_index=True, return_counts=True)
+        arrays.update(by_state=by_state, states=states, state_starts=starts, state_stops=starts + counts,
+                      version=np.array(TABLE_VERSION))
+        return cls(arrays)
+
+    def save(self, path=TABLE_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        np.savez(path + '.tmp.npz', **self.arrays)
+        os.replace(path + '.tmp.npz', path)
+
+    def _population_slice(self, rows, min_population=None, max_population=None):
+        """rows (sorted by population) within [min, max]. falsy limits are ignored, like the old df.query filters"""
+        population = self.population[rows]
+        lo = np.searchsorted(population, min_population, 'left') if min_population else 0
+        hi = np.searchsorted(population, max_population, 'right') if max_population else len(rows)
+        return rows[lo:hi]
+
+    def select(self, states=None, min_population=None, max_population=None, min_density=None, max_density=None):
+        """row ids (in CSV order) of cities in states with population/density inside the given inclusive limits"""
+        if states:
+            spans = np.searchsorted(self.states, states)
+            spans = [i for i, s in zip(spans, states) if i < len(self.states) and self.states[i] == s]
+            rows = np.concatenate([self._population_slice(self.by_state[self.state_starts[i]:self.state_stops[i]],
+                                                          min_population, max_population) for i in sorted(set(spans))]
+                                  or [np.empty(0, dtype=int)])
+        else:
+            rows = self._population_slice(self.by_population, min_population, max_population)
+        density = self.density[rows]
+        keep = np.ones(len(rows), dtype=bool)
+        if min_density:
+            keep &= density >= min_density
+        if max_density:
+            keep &= density <= max_density
+        return np.sort(rows[keep])
+
+    def select_net(self, net, states=None):
+        """rows for a get_urls.Net preset"""
+        return self.select(states, net.min_population, net.max_population, net.min_density, net.max_density)
+
+    def records(self, rows, columns=COLUMNS):
+        """{column: value} dicts for rows, with plain python values"""
+        columns = list(columns)
+        values = [self.arrays[c][rows].tolist() for c in columns]
+        return [dict(zip(columns, row)) for row in zip(*values)]
+
+
+_TABLE = None
+
+def get_city_table(path=USCITIES_PATH, table_path=TABLE_PATH):
+    """loads the saved table (building + saving it first if missing or older than uscities.csv). cached per process"""
+    global _TABLE
+    if _TABLE is None:
+        if os.path.exists(table_path) and os.path.getmtime(table_path) >= os.path.getmtime(path):
+            with np.load(table_path) as saved:
+                _TABLE = CityTable({key: saved[key] for key in saved.files})
+        if _TABLE is None or int(_TABLE.arrays.get('version', 0)) != TABLE_VERSION:
+            _TABLE = CityTable.build(path)
+            _TABLE.save(table_path)
+    return _TABLE
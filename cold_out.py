@@ -8,10 +8,14 @@ import pyinputplus as pyip
 from tqdm import tqdm
 import phantombuster as pb
 from hunter_leads import *
-from parse_pb import parse_results
+from parse_pb import parse_result_files
+from result_cache import RESULT_CACHE
 from hunter_domain_search import bulk_domain_search
 from get_urls import get_list_of_search_urls
 from google_api import get_csv_for_phantombuster
+from checkpoints import StagePipeline, file_hash
+from phantom_scheduler import ScrapeJob, launch_sharded_scrape
+from scrape_history import SCRAPE_HISTORY
 import admins
 
 
@@ -86,6 +90,12 @@ TAG = SESSION.tag
 # Starting from scratch. Will generate search url csv and upload csv to Phantombuster
 if START_POINT == "Start new scrape":
     SEARCH_URLS = get_list_of_search_urls() # executes get_urls.py
+    num_phantoms = pyip.inputInt('\nHow many Phantoms should this scrape be split across? (1 = single Phantom)\n', min=1, max=15)
+    if num_phantoms > 1: # shards run in parallel and are tracked together as one job under this tag
+        SCRAPE_JOB = launch_sharded_scrape(SEARCH_URLS, TAG, num_phantoms)
+        if SCRAPE_JOB:
+            print(f'\nUse the tag {TAG} to collect the results of every shard later.')
+        quit()
     SEARCH_URLS_DATA = get_csv_for_phantombuster(SEARCH_URLS, TAG) # creates public csv on Drive and returns tuple with (URL, file name)
     prompt = '\nWould you like to specify which Phantom to use? (If no, oldest Phantom will be used)\n'
     specify_phantom = pyip.inputYesNo(prompt)
@@ -105,6 +115,7 @@ if START_POINT == "Start new scrape":
     if ready_to_launch:
         launch_result = pb.launch_phantom(int(upserted_phantom[1]))
         if launch_result == "Success":
+            SCRAPE_HISTORY.record(f'search_urls/{SEARCH_URLS_DATA[1]}') # so later sweeps know these cities were scraped today
             print(f'\nPhantom succesfully launched! Approximate Phantom exection time is 5 hours. Use the tag {TAG} to access this Phantom later.')
             quit()
         else:
@@ -117,7 +128,9 @@ if START_POINT == "Start new scrape":
 if START_POINT == "Continue existing scrape":
     existing_customer_filepath = SESSION.existing_customer_file # original code to be (hopefully replaced with UGP API)
     ACCOUNT = pb.get_user_info()
-    PHANTOM_ID = ACCOUNT.get_phantom_id(TAG)
+    SCRAPE_JOB = ScrapeJob.load(TAG) # set if this tag's scrape was split across several phantoms
+    if not SCRAPE_JOB:
+        PHANTOM_ID = ACCOUNT.get_phantom_id(TAG)
 
     # Testing..
     # dental_phantom_id = ACCOUNT.get_phantom_id("dental")
@@ -127,36 +140,48 @@ if START_POINT == "Continue existing scrape":
 
 
     print('\nFetching results from Phantombuster...')
-    RESULT_CSV = pb.fetch_results_csv(PHANTOM_ID)
-
-    print('\nParsing Phantombuster results...')
-    PB_RESULTS = []
-    # parse_results returns single dataframe or array of dataframes currently
-    # returned DF(s) should include formatted/filtered PB results
-    if len(RESULT_CSV) > 1:
-        for url in RESULT_CSV: 
-            PB_RESULTS.append(parse_results(url, existing_customer_filepath))
-        PB_RESULTS = pd.concat(PB_RESULTS, ignore_index=True)
+    if SCRAPE_JOB:
+        SCRAPE_JOB.print_status(ACCOUNT)
+        RESULT_CSV = SCRAPE_JOB.result_csvs()
     else:
-        PB_RESULTS = parse_results(RESULT_CSV[0], existing_customer_filepath)
+        RESULT_CSV = pb.fetch_results_csv(PHANTOM_ID)
+    RESULT_FILES = RESULT_CACHE.fetch_many(RESULT_CSV) # local copies, named by content hash. unchanged files are not downloaded again
+    print(RESULT_CACHE)
+
+    # each stage below is checkpointed under checkpoints/{TAG}/. stages whose inputs haven't changed since the
+    # last run of this session load their saved output instead of running again
+    PIPELINE = StagePipeline(TAG)
+
+    def parse_stage(result_files, existing_customers_hash):
+        """result_files are content-addressed, so the stage re-runs only when the results themselves change.
+           existing_customers_hash is only there so an updated customer file re-runs this stage"""
+        # returned DF(s) should include formatted/filtered PB results. files are parsed in parallel processes
+        PB_RESULTS = parse_result_files(result_files, existing_customer_filepath)
+        return pd.concat(PB_RESULTS, ignore_index=True) if len(PB_RESULTS) > 1 else PB_RESULTS[0]
         # PB_RESULTS.to_csv('testing_dump/pb-format-test.csv')
 
+    print('\nParsing Phantombuster results...')
+    PB_RESULTS = PIPELINE.run('parse', parse_stage, RESULT_FILES, file_hash(existing_customer_filepath))
+
     # Assign leads to Admnis, initiate Hunter Domain Search
     print('\nRetrieving admins...')
     ADMINS = admins.get_admins() # includes prompt to exclude store codes, likely will need to move this prompt
 
     print('\nCreating lead accounts and assigning owners...') 
-    ALL_ACCOUNTS = admins.get_accounts(PB_RESULTS,ADMINS) # assigns admins to each lead. returns array of Accounts objects
+    ALL_ACCOUNTS = PIPELINE.run('assign', admins.get_accounts, PB_RESULTS, ADMINS) # assigns admins to each lead. returns array of Accounts objects
     acceptable_categories = admins.get_acceptable_categories(ALL_ACCOUNTS)
     GOOD_ACCOUNTS = [x for x in ALL_ACCOUNTS if x.category in acceptable_categories]
     # Testing...
     account_df = pd.DataFrame(GOOD_ACCOUNTS)
     account_df.to_csv('testing_dump/pb-good-accounts-test.csv')
 
-    initiate_domain_search = pyip.inputYesNo(prompt=f"\n{len(GOOD_ACCOUNTS)} good domains found. Execute Hunter Domain search? (This process will take several minutes depending on length of list)\n$")
+    if PIPELINE.is_fresh('domain_search', GOOD_ACCOUNTS, TAG): # already paid for this search, no need to ask
+        initiate_domain_search = "yes"
+    else:
+        initiate_domain_search = pyip.inputYesNo(prompt=f"\n{len(GOOD_ACCOUNTS)} good domains found. Execute Hunter Domain search? (This process will take several minutes depending on length of list)\n$")
     if initiate_domain_search == "yes":
         print('\nExecuting Hunter.io Domain Search...')
-        HUNTER_RESULTS = bulk_domain_search(GOOD_ACCOUNTS, TAG)
+        HUNTER_RESULTS = PIPELINE.run('domain_search', bulk_domain_search, GOOD_ACCOUNTS, TAG)
         # Generate backup CSV...remove after testing
         upload_data = utils.generate_backup_csv(HUNTER_RESULTS, TAG)
         udf = pd.DataFrame(upload_data)
@@ -167,8 +192,8 @@ if START_POINT == "Continue existing scrape":
 
     # Filter Hunter search results, create Lead Lists and Leads
     print('\nFiltering leads...')
-    generic_filter = filter_generics(HUNTER_RESULTS) # filters out bad generic web domains
-    keep_leads = verification_filter(generic_filter) # filters based on deliverability + confidence score 
+    generic_filter = PIPELINE.run('filter', filter_generics, HUNTER_RESULTS) # filters out bad generic web domains
+    keep_leads = PIPELINE.run('verify', verification_filter, generic_filter) # filters based on deliverability + confidence score 
 
     # creates physical CSV of leads in case of interrupt/failure
     print('\nCreating backup CSV file...') 
@@ -183,7 +208,7 @@ if START_POINT == "Continue existing scrape":
         print('\nCreating Hunter Lead Lists...')
         lead_list_ids = bulk_lead_list_create(TAG, ADMINS)
         print('\nCreating Leads in Hunter...') 
-        bulk_lead_create(TAG, keep_leads, ADMINS)
+        bulk_lead_create(TAG, keep_leads, ADMINS) # upload journal makes this stage resumable on its own
         utils.store_timestamp(TAG) # stores timestamp in registry with {{TAG:timestamp}. used to get incremental results from phantombuster 
     else:
         print('\nOperation cancelled! Exiting...')
@@ -0,0 +1,86 @@
+"""
+Coverage planner for Google Maps search URLs. The naive plan searches one 12z viewport per city, so a metro with
+dozens of suburbs in uscities.csv gets dozens of overlapping searches returning the same businesses. plan_coverage
+picks a zoom per city from its density/population, then walks cities biggest first and drops any city already
+sitting inside the central part of a kept city's viewport. Neighbours are found through a lat/lng grid, so a
+nationwide plan takes well under a second.
+"""
+
+import numpy as np
+
+VIEWPORT_PX = (1280, 800) # width, height of the browser window Phantombuster opens Maps in (assumed)
+KM_PER_DEGREE_LAT = 110.57
+KM_PER_DEGREE_LNG = 111.32 # at the equator
+ZOOM_RULES = [(2500, 0, 13), (1000, 0, 12), (0, 100000, 12)] # (min density, min population, zoom), first match wins
+FALLBACK_ZOOM = 11 # small, sparse towns -- a wider viewport picks up the businesses around them
+DEFAULT_COVER = 0.5 # a city is covered if it sits within this fraction of a kept viewport's half-width/height
+
+
+def viewport_km(lats, zooms):
+    """(width, height) in km of a VIEWPORT_PX Maps window at each lat/zoom (web mercator scale)"""
+    km_per_px = 156.54303392 * np.cos(np.radians(lats)) / 2.0 ** np.asarray(zooms)
+    return VIEWPORT_PX[0] * km_per_px, VIEWPORT_PX[1] * km_per_px
+
+
+def pick_zooms(populations, densities):
+    """zoom per city from ZOOM_RULES: dense places get tighter viewports, sparse small towns wider ones"""
+    populations, densities = np.asarray(populations), np.asarray(densities)
+    conditions = [(densities >= d) & (populations >= p) for d, p, _ in ZOOM_RULES]
+    return np.select(conditions, [z for _, _, z in ZOOM_RULES], FALLBACK_ZOOM)
+
+
+def _project(lats, lngs):
+    """equirectangular x/y in km -- plenty accurate at viewport scale"""
+    return np.asarray(lngs) * KM_PER_DEGREE_LNG * np.cos(np.radians(lats)), np.asarray(lats) * KM_PER_DEGREE_LAT
+
+
+def plan_coverage(lats, lngs, populations, densities, cover=DEFAULT_COVER):
+    """greedy cover: (indexes of the cities to search, their zooms). cities are kept biggest first; a city inside
+       the central `cover` part of an already kept city's viewport is dropped. kept indexes are in input order"""
+    lats, lngs = np.asarray(lats, dtype=float), np.asarray(lngs, dtype=float)
+    zooms = pick_zooms(populations, densities)
+    widths, heights = viewport_km(lats, zooms)
+    half_w, half_h = widths * cover / 2, heights * cover / 2
+    xs, ys = _project(lats, lngs)
+    cell = max(half_w.max(), half_h.max()) if len(lats) else 1.0 # any covering viewport is at most one cell away
+    grid = {}
+    kept = []
+    for i in np.argsort(-np.asarray(populations), kind='stable').tolist():
+        cx, cy = int(xs[i] // cell), int(ys[i] // cell)
+        covered = any(abs(xs[i] - xs[a]) <= half_w[a] and abs(ys[i] - ys[a]) <= half_h[a]
+                      for dx in (-1, 0, 1) for dy in (-1, 0, 1) for a in grid.get((cx + dx, cy + dy), ()))
+        if not covered:
+            grid.setdefault((cx, cy), []).append(i)
+            kept.append(i)
+    kept = np.sort(np.array(kept, dtype=int))
+    return kept, zooms[kept]
+
+
+def _cells(lats, lngs, zooms, cell_km=2.0):
+    """(unique cell_km grid cells under the viewports, summed viewport size in cells)"""
+    if not len(lats):
+        return np.empty(0, dtype=np.int64), 0
+    lats, zooms = np.asarray(lats, dtype=float), np.asarray(zooms)
+    xs, ys = _project(lats, lngs)
+    widths, heights = viewport_km(lats, zooms)
+    total, cells = 0, []
+    for zoom in np.unique(zooms):
+        group = zooms == zoom
+        nx, ny = max(1, int(round(widths[group].max() / cell_km))), max(1, int(round(heights[group].max() / cell_km)))
+        gx = (xs[group] // cell_km).astype(np.int64)[:, None] + (np.arange(nx) - nx // 2)[None, :]
+        gy = (ys[group] // cell_km).astype(np.int64)[:, None] + (np.arange(ny) - ny // 2)[None, :]
+        cells.append((gx[:, :, None] * 1000003 + gy[:, None, :]).ravel())
+        total += int(group.sum()) * nx * ny
+    return np.unique(np.concatenate(cells)), total
+
+
+def coverage_report(lats, lngs, kept, zooms, naive_zoom=12):
+    """(share of area searched more than once by the naive per-city plan, same for the planned viewports,
+       share of the naive plan's area the planned viewports still cover), estimated on a 2 km raster"""
+    lats, lngs = np.asarray(lats, dtype=float), np.asarray(lngs, dtype=float)
+    naive_cells, naive_total = _cells(lats, lngs, np.full(len(lats), naive_zoom))
+    plan_cells, plan_total = _cells(lats[kept], lngs[kept], zooms)
+    if not naive_total:
+        return 0.0, 0.0, 1.0
+    return (1 - len(naive_cells) / naive_total, 1 - len(plan_cells) / plan_total,
+            len(np.intersect1d(naive_cells, plan_cells, assume_unique=True)) / len(naive_cells))
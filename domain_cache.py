@@ -0,0 +1,117 @@
+"""
+Persistent on-disk cache of Hunter Domain Search responses (SQLite). Keyed by normalized domain, stores the raw
+response + fetch timestamp so repeat sweeps of the same industry/city don't pay for the same domains twice.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from lazy_sqlite import LazyConnection
+import threading
+import json
+import time
+
+CACHE_PATH = 'cache/domain_search.db'
+DEFAULT_TTL_DAYS = 90
+COMPANY_PREFIX = 'company:'
+
+
+def normalize_domain(domain):
+    """lowercases and strips scheme, www., path and port so 'https://www.Foo.com/about' == 'foo.com'"""
+    domain = str(domain).strip().lower()
+    if '://' in domain:
+        domain = domain.split('://', 1)[1]
+    domain = domain.split('/')[0].split('?')[0].split(':')[0]
+    if domain.startswith('www.'):
+        domain = domain[4:]
+    return domain.rstrip('.')
+
+
+def cache_key(domain, company=None):
+    """normalized domain, or 'company:<name>' when there's no domain and the search falls back to the company name
+       (so domain-less accounts don't all share one entry). None if there's neither"""
+    if domain and type(domain) == str and normalize_domain(domain):
+        return normalize_domain(domain)
+    if company and str(company).strip():
+        return COMPANY_PREFIX + ' '.join(str(company).lower().split())
+    return None
+
+
+def split_key(key):
+    """(domain, company) search arguments for a cache key"""
+    if key.startswith(COMPANY_PREFIX):
+        return None, key[len(COMPANY_PREFIX):]
+    return key, None
+
+
+class DomainCache:
+    """SQLite-backed cache. safe to share between threads (single connection guarded by a lock)"""
+    def __init__(self, path=CACHE_PATH, ttl_days=DEFAULT_TTL_DAYS):
+        self.path = path
+        self.ttl = ttl_days * 86400
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.db = LazyConnection(path, 'CREATE TABLE IF NOT EXISTS domain_search (domain TEXT PRIMARY KEY, response TEXT NOT NULL, fetched_at REAL NOT NULL)')
+
+    @property
+    def conn(self):
+        return self.db.get()
+
+    def __str__(self):
+        return f'\nDomain cache: {self.hits} hits / {self.misses} misses ({self.hit_rate():.0%} hit rate)'
+
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits/total if total else 0.0
+
+    def get(self, domain, company=None):
+        """returns cached response if fetched within TTL, otherwise None. updates hit/miss counters.
+           company is the key when domain is empty (same fallback as domain_search)"""
+        key = cache_key(domain, company)
+        with self.lock:
+            row = self.conn.execute('SELECT response, fetched_at FROM domain_search WHERE domain = ?', (key,)).fetchone() if key else None
+            if row and time.time() - row[1] <= self.ttl:
+                self.hits += 1
+                return json.loads(row[0])
+            self.misses += 1
+            return None
+
+    def put(self, domain, response, company=None):
+        key = cache_key(domain, company)
+        if key:
+            self._put(key, response)
+
+    def _put(self, key, response):
+        with self.lock, self.conn:
+            self.conn.execute('INSERT OR REPLACE INTO domain_search VALUES (?, ?, ?)', (key, json.dumps(response), time.time()))
+
+    def stale_domains(self, limit=None):
+        """keys (see cache_key) whose cached response is older than the TTL, oldest first"""
+        query = 'SELECT domain FROM domain_search WHERE fetched_at < ? ORDER BY fetched_at'
+        params = (time.time() - self.ttl,)
+        if limit:
+            query += ' LIMIT ?'
+            params += (limit,)
+        with self.lock:
+            return [row[0] for row in self.conn.execute(query, params)]
+
+    def refresh_stale(self, fetch, limit=None, workers=4, background=False):
+        """re-fetches stale entries with `fetch(domain, company) -> response` (e.g. domain_search). if background is True, runs in a daemon
+           thread and returns the thread so the caller can keep working (or join it later)"""
+        def refresh():
+            def refresh_one(key):
+                try:
+                    self._put(key, fetch(*split_key(key)))
+                    return True
+                except Exception as e:
+                    print(e)
+                    return False
+            domains = self.stale_domains(limit)
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                refreshed = sum(executor.map(refresh_one, domains))
+            print(f'\nRefreshed {refreshed} of {len(domains)} stale cached domains.')
+            return refreshed
+        if background:
+            thread = threading.Thread(target=refresh, daemon=True)
+            thread.start()
+            return thread
+        return refresh()
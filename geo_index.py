@@ -0,0 +1,87 @@
+"""
+Lookup index built from uscities.csv: ZIP -> city/state/lat/lng and (city, state) -> lat/lng. Lets get_accounts
+resolve most scraped addresses with a dict lookup on their trailing "City, ST 12345", leaving the slow usaddress
+CRF parser as a fallback. Built once and pickled to cache/ (rebuilt automatically if uscities.csv changes).
+"""
+
+import pandas as pd
+import pickle
+import re
+import os
+
+USCITIES_PATH = 'uscities.csv'
+INDEX_PATH = 'cache/geo_index.pkl'
+
+# "..., Detroit, MI 48201" / "..., Detroit, MI" / "... MI 48201-1234, United States"
+_CITY_STATE_RE = re.compile(r',\s*([^,]+?),\s*([A-Z]{2})(?:\s+(\d{5})(?:-\d{4})?)?\s*(?:,\s*(?:USA|United States))?\s*$')
+_ZIP_RE = re.compile(r'\b(\d{5})(?:-\d{4})?\s*(?:,\s*(?:USA|United States))?\s*$')
+
+
+INDEX_VERSION = 2 # bump when GeoIndex's fields change so stale pickles get rebuilt
+
+
+class GeoIndex:
+    def __init__(self, zips, cities, states):
+        self.version = INDEX_VERSION
+        self.zips = zips # '48201': ('Detroit', 'MI', 42.38, -83.10)
+        self.cities = cities # ('detroit', 'MI'): ('Detroit', 42.38, -83.10)
+        self.states = states # 'MI': population-weighted (lat, lng) centroid
+
+    @classmethod
+    def build(cls, path=USCITIES_PATH):
+        df = pd.read_csv(path, usecols=['city', 'state_id', 'lat', 'lng', 'population', 'zips'], dtype={'zips': str})
+        df.sort_values('population', ascending=False, inplace=True) # a ZIP shared by two places goes to the bigger one
+        zips, cities = {}, {}
+        for city, state, lat, lng, zip_codes in zip(df['city'], df['state_id'], df['lat'], df['lng'], df['zips'].fillna('')):
+            cities.setdefault((city.lower(), state), (city, lat, lng))
+            for z in zip_codes.split():
+                zips.setdefault(z, (city, state, lat, lng))
+        weights = df['population'].clip(lower=1)
+        centroids = (df[['lat', 'lng']].mul(weights, axis=0).groupby(df['state_id']).sum()
+                     .div(weights.groupby(df['state_id']).sum(), axis=0))
+        states = {state: (row.lat, row.lng) for state, row in centroids.iterrows()}
+        return cls(zips, cities, states)
+
+    def city_coords(self, city, state):
+        """(lat, lng) for a city/state pair, or None"""
+        found = self.cities.get((str(city).lower(), state))
+        return found[1:] if found else None
+
+    def coords(self, city, state):
+        """best known (lat, lng): the city if uscities has it, else the state's centroid, else None"""
+        return self.city_coords(city, state) or self.states.get(state)
+
+    def resolve(self, address):
+        """(city, state) for an address ending in 'City, ST' and/or a ZIP, or None if the index can't tell.
+           a written city is trusted if uscities knows it in that state; otherwise the ZIP decides"""
+        if type(address) != str:
+            return None
+        match = _CITY_STATE_RE.search(address)
+        if match:
+            city, state, zip_code = match.groups()
+            if (city.lower(), state) in self.cities:
+                return city, state
+        else:
+            zip_match = _ZIP_RE.search(address)
+            zip_code = zip_match.group(1) if zip_match else None
+        if zip_code and zip_code in self.zips:
+            city, state = self.zips[zip_code][:2]
+            return city, state
+        return None
+
+
+_INDEX = None
+
+def get_geo_index(path=USCITIES_PATH, index_path=INDEX_PATH):
+    """loads the pickled index (building + saving it first if missing or older than uscities.csv). cached per process"""
+    global _INDEX
+    if _INDEX is None:
+        if os.path.exists(index_path) and os.path.getmtime(index_path) >= os.path.getmtime(path):
+            with open(index_path, 'rb') as f:
+                _INDEX = pickle.load(f)
+        if getattr(_INDEX, 'version', None) != INDEX_VERSION:
+            _INDEX = GeoIndex.build(path)
+            os.makedirs(os.path.dirname(index_path), exist_ok=True)
+            with open(index_path, 'wb') as f:
+                pickle.dump(_INDEX, f)
+    return _INDEX
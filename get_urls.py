@@ -4,10 +4,12 @@ Currently takes user input for States, population/density requirments, etc to fi
 used for targeted search or nationwide
 """
 from pydantic import BaseModel
-import pandas as pd
 import pyinputplus as pyip
-from tqdm import tqdm
+from itertools import repeat
 from google_api import get_csv_for_phantombuster
+from city_table import get_city_table
+from coverage import plan_coverage, coverage_report
+from scrape_history import SCRAPE_HISTORY, DEFAULT_WINDOW_DAYS, MINUTES_PER_SEARCH_URL
 
 class City(BaseModel):
     """Class object to store city data"""
@@ -17,6 +19,7 @@ class City(BaseModel):
     lat: float
     lng: float
     population: int
+    zoom: int = 12
 
 class Net:
     "Class object to store net size data (for search parameters)"
@@ -63,35 +66,72 @@ def set_net_size():
     return net_size
 
 
+def iter_search_urls(cities: list[City], search_terms: list[str], city_orders=None):
+    """generator of (url, city, term) rows, term by term, city by city. city_orders optionally gives, per term, the
+       indexes of the cities to search in order (see plan_against_history). the per-city part of each url is built
+       once, so each row is a single string join. urls match the old format exactly:
+       https://www.google.com/maps/search/{city}+{state}+{term}/@{lat},{lng},12z/ (lowercased, spaces -> +)"""
+    prefixes = [f'https://www.google.com/maps/search/{city.city.lower().replace(" ", "+")}+{city.state_name.lower().replace(" ", "+")}+'
+                for city in cities]
+    suffixes = [f'/@{city.lat},{city.lng},{city.zoom}z/' for city in cities]
+    names = [city.city for city in cities]
+    for i, search_term in enumerate(search_terms):
+        order = city_orders[i] if city_orders else range(len(cities))
+        formatted_term = search_term.lower().replace(' ', '+')
+        yield from zip([prefixes[c] + formatted_term + suffixes[c] for c in order], [names[c] for c in order], repeat(search_term))
+
+def plan_viewports(table, rows):
+    """runs the coverage planner over the selected cities and reports what it saved. returns (rows, zooms)"""
+    lats, lngs = table.lat[rows], table.lng[rows]
+    kept, zooms = plan_coverage(lats, lngs, table.population[rows], table.density[rows])
+    naive_dup, plan_dup, retained = coverage_report(lats, lngs, kept, zooms)
+    removed = len(rows) - len(kept)
+    print(f'{len(rows)} cities -> {len(kept)} viewports. {removed} overlapping searches removed '
+          f'(~{removed * MINUTES_PER_SEARCH_URL / 60:.1f} hours of Phantom time per search term).')
+    print(f'Area searched more than once: {naive_dup:.0%} -> {plan_dup:.0%}. Share of the per-city area still covered: {retained:.0%}.')
+    return rows[kept], zooms.tolist()
+
+def plan_against_history(cities: list[City], search_terms: list[str], window_days=DEFAULT_WINDOW_DAYS, history=SCRAPE_HISTORY):
+    """checks each city/term pair against past launched sweeps. if any were scraped within window_days, asks
+       whether to skip them or search them last. returns city_orders for iter_search_urls (None = search everything)"""
+    recent = [history.recent(term, window_days) for term in search_terms]
+    scraped = [[(city.city.lower(), city.state_id) in r for city in cities] for r in recent]
+    num_scraped = sum(map(sum, scraped))
+    if not num_scraped:
+        return None
+    choices = ["Skip them", "Search them last", "Search them anyway"]
+    response = pyip.inputMenu(choices, f"\n{num_scraped} of these city/term searches were already scraped in the last {window_days} days. What would you like to do?\n", numbered=True)
+    if response == "Search them anyway":
+        return None
+    fresh = [[c for c, done in enumerate(s) if not done] for s in scraped]
+    if response == "Skip them":
+        hours = num_scraped * MINUTES_PER_SEARCH_URL / 60
+        print(f'Skipping {num_scraped} already scraped searches. Saves roughly {hours:.1f} hours of Phantom execution time.')
+        return fresh
+    print(f'{num_scraped} already scraped searches moved to the end of the list. Stopping the Phantom early saves up to {num_scraped * MINUTES_PER_SEARCH_URL / 60:.1f} hours.')
+    return [f + [c for c, done in enumerate(s) if done] for f, s in zip(fresh, scraped)]
+
 def get_list_of_search_urls():
     """Asks user for input to determine Google search parameters. Determines which cities to search
         based on population size / density"""
-    df = pd.read_csv('uscities.csv')
+    table = get_city_table() # columnar uscities, cached under cache/
 
     # Asks user to specify a state to search -- don't love this, may change later
     search_states = pyip.inputStr('List the states you would like to search. Separate each one by a comma. Use the 2-letter abbreviation. \n*To search all states, leave blank:*\n',blank=True)
     if search_states:
         states = search_states.split(',')
         states = [x.strip().upper() for x in states]
-        df.query('state_id in @states',inplace=True)
+    else:
+        states = None
 
     # NEW: simplified paramater getting to net_size (vs. user entering numbers manually). Sets search params based on size of the "net" we want to cast
     net_size = set_net_size() # gets user input to determine search params, and returns Net class object w/ params
-    population_lower_limit = net_size.min_population
-    population_upper_limit = net_size.max_population
-    density_lower_limit = net_size.min_density
-    density_upper_limit = net_size.max_density
-    # Filters DataFrame based on search params
-    if population_lower_limit:
-        df.query('population >= @population_lower_limit', inplace=True)
-    if population_upper_limit:
-        df.query('population <= @population_upper_limit', inplace=True)
-    if density_lower_limit:
-        df.query('density >= @density_lower_limit', inplace=True)
-    if density_upper_limit:
-        df.query('density <= @density_upper_limit', inplace=True) 
-   
-    cities = [City(**row) for i,row in df.iterrows()] # return list of cities from df, filtered by params
+    rows = table.select_net(net_size, states) # slices of the population/state indexes + a density mask
+    zooms = [12] * len(rows)
+    if len(rows) > 1 and pyip.inputYesNo('\nMerge overlapping searches of neighbouring cities into shared viewports? (zoom is set from density/population)\n$') == 'yes':
+        rows, zooms = plan_viewports(table, rows)
+    records = table.records(rows, [field for field in City.__fields__ if field != 'zoom'])
+    cities = [City.construct(**record, zoom=zoom) for record, zoom in zip(records, zooms)] # values come typed from the table, no validation needed
 
     search_terms = input('List the categories/industries you would like to search. Separate each one by a comma.\n')
     if search_terms:
@@ -101,22 +141,10 @@ def get_list_of_search_urls():
         print('No search terms provided')
         exit()
 
-    data = []
-    for search_term in search_term_list:
-        for city in tqdm(cities):
-            st = ' '.join([city.city.lower(),city.state_name.lower(),search_term.lower()])
-            formatted_search_term = st.replace(' ','+')
-            zoom = 12
-            url = f'https://www.google.com/maps/search/{formatted_search_term}/@{city.lat},{city.lng},{zoom}z/'
-            data.append(
-                {
-                    'url':url,
-                    'city':city.city,
-                    'term':search_term
-                    
-                }
-            )
-    print(f'Generated {len(data)} search URLs for {len(cities)} cities in {len(search_term_list)} categories.')
+    city_orders = plan_against_history(cities, search_term_list) # skip / deprioritize pairs scraped in past sweeps
+    num_urls = sum(map(len, city_orders)) if city_orders else len(cities) * len(search_term_list)
+    print(f'Generating {num_urls} search URLs for {len(cities)} cities in {len(search_term_list)} categories.')
+    data = iter_search_urls(cities, search_term_list, city_orders) # streamed, rows are only built as the CSV is written
     
     # original code, exported search results to CSV...
     # save_as = input('Save as: ')
@@ -124,5 +152,5 @@ def get_list_of_search_urls():
     # urlsheet.to_csv(f'search_urls/{save_as}.csv',index=False)
     # print(f'Done. Saved as {save_as}.csv')
 
-    return data # returns list of objects with search url + metadata
+    return data # returns generator of (url, city, term) rows
 
@@ -11,8 +11,8 @@ from google.oauth2.credentials import Credentials
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 from googleapiclient.http import MediaFileUpload
-import pandas as pd
 import requests
+import csv
 
 # Load the authentication settings from the settings.yaml file
 with open('settings.yaml', 'r') as f:
@@ -35,17 +35,21 @@ def print_recent_files():
         for item in items:
             print(f'{item["name"]} ({item["id"]})')
 
-def get_csv_for_phantombuster(search_urls, TAG):
-    """creates a csv file from get_urls results (list of search urls), uploads to Google Drive,
-       sets sharing settings to public, and returns public link to .csv"""
-    df = pd.DataFrame(search_urls)
+SEARCH_URL_COLUMNS = ['url', 'city', 'term'] # header of every search url csv, Phantombuster reads the 'url' column
 
-    # Create a CSV file from the DataFrame
-    filename = f'{TAG}_urls.csv'
-    csv_file = f'search_urls/{filename}'
-    df.to_csv(csv_file, index=False)
+def write_search_urls_csv(search_urls, csv_file):
+    """streams (url, city, term) rows into csv_file (same bytes df.to_csv(index=False) wrote). returns # of rows"""
+    num_rows = 0
+    with open(csv_file, 'w', newline='') as f:
+        writer = csv.writer(f, lineterminator='\n')
+        writer.writerow(SEARCH_URL_COLUMNS)
+        for row in search_urls:
+            writer.writerow(row)
+            num_rows += 1
+    return num_rows
 
-    # Upload the CSV file to Google Drive and set the sharing settings to public
+def upload_csv(csv_file, filename):
+    """uploads a local csv to the Phantombuster Drive folder as a public spreadsheet and returns (link, filename)"""
     print('\nCreating file in Google Drive...')
     try:
         service = build('drive', 'v3', credentials=creds)
@@ -62,4 +66,12 @@ def get_csv_for_phantombuster(search_urls, TAG):
     except HttpError as error:
         print(f'An error occurred: {error}')
 
+def get_csv_for_phantombuster(search_urls, TAG):
+    """creates a csv file from get_urls results ((url, city, term) rows, e.g. the get_list_of_search_urls generator),
+       uploads to Google Drive, sets sharing settings to public, and returns public link to .csv"""
+    filename = f'{TAG}_urls.csv'
+    csv_file = f'search_urls/{filename}'
+    write_search_urls_csv(search_urls, csv_file)
+    return upload_csv(csv_file, filename)
+
 # print_recent_files()
\ No newline at end of file
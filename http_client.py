@@ -0,0 +1,119 @@
+"""
+Shared HTTP client for every API module (Hunter, Phantombuster). One pooled requests.Session so repeat calls to
+the same host reuse keep-alive connections instead of paying TCP+TLS setup every time. Also handles:
+per-host concurrency caps, default timeouts, exponential backoff on 429/5xx, and per-endpoint latency stats.
+Function signatures mirror requests.get/post/put/delete so call sites only change the module name.
+"""
+
+from urllib.parse import urlparse
+from requests.adapters import HTTPAdapter
+import threading
+import requests
+import time
+import re
+from rate_limit import backoff_delay
+
+DEFAULT_TIMEOUT = (5, 60) # (connect, read) seconds
+MAX_PER_HOST = 16 # max requests in flight to one host at a time
+MAX_RETRIES = 5
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+IDEMPOTENT_METHODS = {'GET', 'PUT', 'DELETE', 'HEAD'} # only these are retried on 5xx/connection errors (a POST may have gone through)
+
+session = requests.Session()
+session.mount('https://', HTTPAdapter(pool_connections=8, pool_maxsize=MAX_PER_HOST))
+session.mount('http://', HTTPAdapter(pool_connections=8, pool_maxsize=MAX_PER_HOST))
+
+_host_slots = {}
+_stats = {}
+_lock = threading.Lock()
+
+
+def _host_slot(host):
+    with _lock:
+        if host not in _host_slots:
+            _host_slots[host] = threading.BoundedSemaphore(MAX_PER_HOST)
+        return _host_slots[host]
+
+
+def endpoint_name(method, url):
+    """stats key for a request, e.g. 'GET api.hunter.io/v2/leads_lists/{id}' (numeric ids collapsed)"""
+    parsed = urlparse(url)
+    return f'{method} {parsed.netloc}{re.sub(r"/[0-9]+(?=/|$)", "/{id}", parsed.path)}'
+
+
+def _record(endpoint, elapsed, status):
+    with _lock:
+        stat = _stats.setdefault(endpoint, {'calls': 0, 'errors': 0, 'retries': 0, 'total_s': 0.0, 'max_s': 0.0})
+        stat['calls'] += 1
+        stat['total_s'] += elapsed
+        stat['max_s'] = max(stat['max_s'], elapsed)
+        if status is None or status >= 400:
+            stat['errors'] += 1
+
+
+def _record_retry(endpoint):
+    with _lock:
+        _stats.setdefault(endpoint, {'calls': 0, 'errors': 0, 'retries': 0, 'total_s': 0.0, 'max_s': 0.0})['retries'] += 1
+
+
+def request(method, url, limiter=None, max_retries=MAX_RETRIES, **kwargs):
+    """sends request through the pooled session. waits on `limiter` (rate_limit.RateLimiter) if given.
+       429s are always retried w/ backoff (and pause the limiter), 5xx/connection errors only for idempotent methods.
+       returns the final requests.Response, like requests does (callers still check status_code)"""
+    method = method.upper()
+    kwargs.setdefault('timeout', DEFAULT_TIMEOUT)
+    endpoint = endpoint_name(method, url)
+    slot = _host_slot(urlparse(url).netloc)
+    for attempt in range(max_retries+1):
+        if limiter:
+            limiter.acquire()
+        start = time.perf_counter()
+        try:
+            with slot:
+                response = session.request(method, url, **kwargs)
+        except requests.exceptions.RequestException:
+            _record(endpoint, time.perf_counter() - start, None)
+            if method not in IDEMPOTENT_METHODS or attempt == max_retries:
+                raise
+            _record_retry(endpoint)
+            time.sleep(backoff_delay(attempt))
+            continue
+        _record(endpoint, time.perf_counter() - start, response.status_code)
+        retryable = response.status_code == 429 or (response.status_code in RETRY_STATUSES and method in IDEMPOTENT_METHODS)
+        if not retryable or attempt == max_retries:
+            return response
+        _record_retry(endpoint)
+        delay = backoff_delay(attempt, response.headers.get('Retry-After'))
+        response.close() # discarded -- frees the pooled connection of a stream=True request
+        if limiter and response.status_code == 429:
+            limiter.pause(delay) # every worker sharing the limiter slows down, not just this one. the next acquire() waits it out
+        else:
+            time.sleep(delay)
+
+
+def get(url, params=None, **kwargs):
+    return request('GET', url, params=params, **kwargs)
+
+def post(url, data=None, json=None, **kwargs):
+    return request('POST', url, data=data, json=json, **kwargs)
+
+def put(url, data=None, **kwargs):
+    return request('PUT', url, data=data, **kwargs)
+
+def delete(url, **kwargs):
+    return request('DELETE', url, **kwargs)
+
+
+def latency_stats():
+    """dict of {endpoint: {calls, errors, retries, total_s, max_s, avg_ms}}"""
+    with _lock:
+        return {k: dict(v, avg_ms=1000*v['total_s']/v['calls'] if v['calls'] else 0.0) for k, v in _stats.items()}
+
+def print_latency_stats():
+    print(f'\n{"endpoint":<60} {"calls":>6} {"errors":>6} {"retries":>7} {"avg ms":>8} {"max ms":>8}')
+    for endpoint, s in sorted(latency_stats().items(), key=lambda x: -x[1]['total_s']):
+        print(f'{endpoint:<60} {s["calls"]:>6} {s["errors"]:>6} {s["retries"]:>7} {s["avg_ms"]:>8.1f} {1000*s["max_s"]:>8.1f}')
+
+def reset_latency_stats():
+    with _lock:
+        _stats.clear()
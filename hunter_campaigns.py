@@ -12,12 +12,14 @@ from pydantic import BaseModel
 from pprint import pprint as pr
 import json
 import datetime
-import requests
+import http_client
+import paginator
 import math
 import pyinputplus as pyip
 import config
 from tqdm import tqdm
 from utils import print_response
+from verification_cache import VERIFICATION_CACHE
 
 # CLASS DECLARATIONS
 
@@ -58,23 +60,19 @@ HUNTER_BASE_URL = 'https://api.hunter.io/v2/'
 
 def get_campaigns(keyword=None) -> 'list[Campaign]': # added optional keyword arg to get only certain campaigns
     url = HUNTER_BASE_URL + 'campaigns'
-    total_campaigns = get_total_campaigns()
     campaigns = []
-    for i in range(math.ceil(float(total_campaigns)/100.0)):
-        params = {'limit':100,'offset':i*100,'api_key':HUNTER_API_KEY}
-        r = requests.get(url,params=params)
-        for response in r.json()['data']['campaigns']:
-            if response['name'].split(' - ')[-1] == "on hold":
-                owner_index = -2
-            else:
-                owner_index = -1
-            if not keyword or keyword and keyword in response['name']: # added logic to check for keyword and only grab those results
-                campaigns.append(Campaign(
-                    hunter_id=response['id'],
-                    name=response['name'],
-                    owner=response['name'].split(' - ')[owner_index],
-                    recipients_count=response['recipients_count']
-                ))
+    for response in paginator.iter_items(url, {'api_key':HUNTER_API_KEY}, 'campaigns'):
+        if response['name'].split(' - ')[-1] == "on hold":
+            owner_index = -2
+        else:
+            owner_index = -1
+        if not keyword or keyword and keyword in response['name']: # added logic to check for keyword and only grab those results
+            campaigns.append(Campaign(
+                hunter_id=response['id'],
+                name=response['name'],
+                owner=response['name'].split(' - ')[owner_index],
+                recipients_count=response['recipients_count']
+            ))
 
     return campaigns
 
@@ -85,7 +83,7 @@ def get_recipients(campaigns: 'list[Campaign]') -> 'list[Recipient]':
         url = f'{HUNTER_BASE_URL}campaigns/{campaign.hunter_id}/recipients?api_key={HUNTER_API_KEY}'
         for i in range(math.ceil(float(campaign.recipients_count)/100.0)):
             params = {'limit':100,'offset':i*100}
-            r = requests.get(url,params=params)
+            r = http_client.get(url,params=params)
             for rec in r.json()['data']['recipients']:
                 campaign.recipients.append(Recipient(
                     email=rec['email'],
@@ -137,22 +135,7 @@ def strip_dollar(x: str) -> float:
 def get_total_campaigns():
     """gets exact number of campaigns from Hunter"""
     url = HUNTER_BASE_URL + "campaigns"
-    offset = 0
-    campaign_count = 0
-    while True:
-        params = {'limit': 100, 'offset':offset, "api_key": HUNTER_API_KEY}
-        try:
-            response = requests.get(url, params)
-            # print(response.text)
-            num_campaigns = len(response.json()['data']['campaigns'])
-            campaign_count += num_campaigns
-            if num_campaigns == 100:
-                offset += 100
-            else:
-                break
-        except Exception as e:
-            print(e)
-    return campaign_count
+    return paginator.count(url, {"api_key": HUNTER_API_KEY}, 'campaigns')
 
 def generate_campaign_reports():
     adf = pd.read_csv('admin_info.csv')
@@ -285,7 +268,11 @@ def clean_recipients(TAG):
         if slug in ['info', 'contact', 'help', 'contact', 'sales', 'careers']:
             leads_to_remove[campaign_id].append(r.email)
         elif not r.first_name:
-            leads_to_check.append((r.lead_id, campaign_id))
+            stored = VERIFICATION_CACHE.get(r.email) # skip the lead lookup if we already know how this email verified
+            if stored and stored.status == "accept_all":
+                leads_to_remove[campaign_id].append(r.email)
+            elif not stored:
+                leads_to_check.append((r.lead_id, campaign_id))
     # print(leads_to_remove)
 
     def check_catchall(lead_data):
@@ -295,8 +282,10 @@ def clean_recipients(TAG):
         url = HUNTER_BASE_URL + 'leads'
         params = {"api_key": HUNTER_API_KEY, "id": lead_id}
         try:
-            response = requests.get(url, params, timeout=30)
+            response = http_client.get(url, params)
             lead = response.json()['data']['leads'][0]
+            if lead['verification']['status'] and lead['verification']['date']:
+                VERIFICATION_CACHE.put(lead['email'], lead['verification']['status'], date=lead['verification']['date'])
             if lead['verification']['status'] == "accept_all":
                 return (lead['email'], campaign_id)
             else:
@@ -324,7 +313,7 @@ def clean_recipients(TAG):
             for chunk in chunks:
                 json_data = json.dumps(chunk)
                 try:
-                    response = requests.delete(url, json={"emails":chunk}, timeout=60)
+                    response = http_client.delete(url, json={"emails":chunk})
                     print_response(response)
                     data = response.json()
                 except Exception as e:
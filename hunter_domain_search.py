@@ -7,7 +7,12 @@ import pandas as pd
 from tqdm import tqdm
 from admins import Account
 from datetime import date, datetime, timedelta
-import requests
+from concurrent.futures import ThreadPoolExecutor
+from rate_limit import HUNTER_DOMAIN_SEARCH_LIMITER, QuotaExceeded
+from domain_cache import DomainCache
+from verification_cache import VERIFICATION_CACHE
+import http_client
+import time
 import admins
 import config
 # Testing...
@@ -15,6 +20,7 @@ import config
 
 hunter = PyHunter(config.HUNTER_API)
 API = config.HUNTER_API
+DOMAIN_CACHE = DomainCache() # responses younger than the TTL skip the API call entirely
 
 class HunterResult(BaseModel):
     """main lead object. stores info about lead + admin assigned to it"""
@@ -69,43 +75,88 @@ class HunterResult(BaseModel):
 # response = hunter.domain_search("undergroundshirts.com", company='Underground Printing')
 # emails_df = pd.DataFrame(response['emails'])
 
-def bulk_domain_search(GOOD_ACCOUNTS, TAG):
-    """process multiple hunter domain_searches. sends GET request for each query, which returns dict with response/results
+DOMAIN_SEARCH_URL = "https://api.hunter.io/v2/domain-search"
+
+def domain_search(domain, company=None, limiter=HUNTER_DOMAIN_SEARCH_LIMITER, url=DOMAIN_SEARCH_URL):
+    """single Hunter domain search (same params as pyhunter's domain_search). waits on the shared rate limiter
+       before each request; http_client backs off on 429/5xx. returns the 'data' dict of the response"""
+    params = {"domain": domain, "api_key": API} if domain else {"company": company, "api_key": API}
+    response = http_client.get(url, params, limiter=limiter, timeout=(5, 30))
+    response.raise_for_status()
+    return response.json()['data']
+
+def results_from_response(response, account):
+    """creates HunterResult objects for each email in a domain search response"""
+    results = []
+    for email in response['emails']:
+        results.append(HunterResult(
+            input_domain=response['domain'],
+            email=email['value'],
+            domain=response['domain'],
+            organization=response['organization'] or account.name,
+            email_type= email['type'],
+            num_sources=len(email['sources']),
+            pattern=response['pattern'],
+            first_name=email['first_name'],
+            last_name=email['last_name'],
+            department=email['department'],
+            position=email['position'],
+            twitter=email['twitter'],
+            linkedin=email['linkedin'],
+            phone=email['phone_number'],
+            confidence=email['confidence'],
+            verification_status=email['verification']['status'],
+            verification_date=email['verification']['date'],
+            account=account,
+            good=True
+        ))
+    return results
+
+def cached_domain_search(domain, company=None, cache=DOMAIN_CACHE, **kwargs):
+    """domain_search, but checks the on-disk cache first and stores fresh responses. pass cache=None to bypass.
+       domain-less searches are cached under the company name they fall back to"""
+    if cache:
+        response = cache.get(domain, company)
+        if response is not None:
+            return response
+    response = domain_search(domain, company, **kwargs)
+    if cache:
+        cache.put(domain, response, company)
+    return response
+
+def refresh_domain_cache(cache=DOMAIN_CACHE, limit=None, background=True):
+    """re-runs domain searches for cached entries older than the TTL. runs in background by default"""
+    return cache.refresh_stale(domain_search, limit=limit, background=background)
+
+def bulk_domain_search(GOOD_ACCOUNTS, TAG, workers=8, url=DOMAIN_SEARCH_URL, limiter=HUNTER_DOMAIN_SEARCH_LIMITER, cache=DOMAIN_CACHE):
+    """process multiple hunter domain_searches concurrently. up to `workers` GET requests are in flight at once,
+       all sharing one token bucket so we stay under Hunter's rate limits. results are returned in input order.
+       domains searched within the cache TTL are served from disk without an API call
        (will likely pass results directly to hunter lead lists, but want to save CSV as well in case of program interrupt)"""
-    all_hunter_results = []
-    errors = []
-    for account in tqdm(GOOD_ACCOUNTS):
+    def search(account):
         try:
-            response = hunter.domain_search(domain=account.domain, company=account.name)
-            for email in response['emails']:
-                all_hunter_results.append(HunterResult(
-                    input_domain=response['domain'],
-                    email=email['value'],
-                    domain=response['domain'],
-                    organization=response['organization'] or account.name,
-                    email_type= email['type'],
-                    num_sources=len(email['sources']),
-                    pattern=response['pattern'],
-                    first_name=email['first_name'],
-                    last_name=email['last_name'],
-                    department=email['department'],
-                    position=email['position'],
-                    twitter=email['twitter'],
-                    linkedin=email['linkedin'],
-                    phone=email['phone_number'],
-                    confidence=email['confidence'],
-                    verification_status=email['verification']['status'],
-                    verification_date=email['verification']['date'],
-                    account=account,
-                    good=True
-                ))                
+            response = cached_domain_search(account.domain, account.name, cache=cache, limiter=limiter, url=url)
+            return results_from_response(response, account)
+        except QuotaExceeded:
+            raise
         except Exception as e:
             print(e)
-            continue
-    print(f'\nSuccess! {len(all_hunter_results)-len(errors)} domains searched!')
+            errors.append(account)
+            return []
+
+    errors = []
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # executor.map yields in submission order, so output order matches GOOD_ACCOUNTS
+        account_results = list(tqdm(executor.map(search, GOOD_ACCOUNTS), total=len(GOOD_ACCOUNTS)))
+    all_hunter_results = [r for results in account_results for r in results]
+    elapsed = time.monotonic() - start
+    print(f'\nSuccess! {len(GOOD_ACCOUNTS)-len(errors)} domains searched in {elapsed:.1f}s ({len(GOOD_ACCOUNTS)/max(elapsed, 1e-9):.1f}/s)')
     success_df = pd.DataFrame.from_records([r.to_dict() for r in all_hunter_results])
     success_df.to_csv(f'testing_dump/{TAG}-domain-search-backup.csv')
     print(f'\n{len(errors)} searches unsuccesful.')
+    if cache:
+        print(cache)
     # error_df = pd.DataFrame(errors)
     # error_df.to_csv('testing_dump/domain-search-error-report.csv')
 
@@ -127,6 +178,11 @@ def results_from_csv(CSV_PATH):
     # total is for tqdm to manually give total num. takes this from "shape" of dataframe. 
     # since iterrows is 2 dimensional, we specify just one of the dimensions
     for i, row in tqdm(df.iterrows(), total=df.shape[0]): 
+        # prefer a newer verification from the shared store over whatever was in the backup
+        stored = VERIFICATION_CACHE.get(row['email'])
+        if stored and stored.date > str(row['verification_date']):
+            row['verification_status'], row['verification_date'] = stored.status, stored.date
+            row['confidence'] = stored.score if stored.score is not None else row['confidence']
         result.append(HunterResult(
             input_domain=row['domain'],
             email=row['email'],
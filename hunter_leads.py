@@ -10,17 +10,27 @@ from pydantic import BaseModel
 from tqdm import tqdm
 import pandas as pd
 import datetime
+import heapq
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from rate_limit import HUNTER_VERIFIER_LIMITER, QuotaExceeded
+from verification_cache import VERIFICATION_CACHE
+from lead_journal import LeadJournal
 import utils
+import lead_filter
 from hunter_domain_search import bulk_domain_search, HunterResult, CSV_PATH, results_from_csv # for testing
 from admins import Account # for testing
 from admins import Admin # for testing
 import admins
-import requests
+import http_client
+import paginator
 import config
 
 
 hunter = PyHunter(config.HUNTER_API)
 API = config.HUNTER_API
+LEAD_JOURNAL = LeadJournal()
 
 class LeadList(BaseModel):
     list_id: int
@@ -30,66 +40,136 @@ class LeadList(BaseModel):
 class Lead(BaseModel):
     pass
 
-def filter_generics(HunterResults):
-    """filters Hunter leads to remove "bad generics" and returns updated list of results"""
-    leads_to_keep = []
-    bad_generics = ["info", "hello", "team", "help", "contact"]
-    good_verify = ['valid', 'accept_all']
-    for domain in tqdm(list(set([x.account.domain for x in HunterResults if x.account]))):
-        domain_leads = [x for x in HunterResults if x.account and x.account.domain == domain]
-        for lead in domain_leads:
-            # Updated 3/27/2023...removed most 'good generics' and now filtering out all that do not have a first_name
-            slug = lead.email.split('@')[0]
-            if slug not in bad_generics and lead.verification_status in good_verify and lead.first_name:
-                lead.good = True
-            else:
-                lead.good = False
+class LeadListIndex:
+    """in-memory index of every lead list on the account, built with one paginated fetch and reused for the session.
+       list names follow '{TAG} - {admin slug}'. rebuilt after `ttl` seconds; create/delete keep it current"""
+    def __init__(self, ttl=900):
+        self.ttl = ttl
+        self.built_at = None
+        self.lists = {} # list_id: LeadList
+        self.by_tag = {} # tag: {slug: list_id}
+        self.by_slug = {} # slug: [list_id, ...]
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def split_name(name):
+        """'safety - jsmith' -> ('safety', 'jsmith')"""
+        return name.rsplit(' - ', 1)[0], name.split(' ')[-1]
+
+    def _add(self, lead_list):
+        self.lists[lead_list.list_id] = lead_list
+        tag, slug = self.split_name(lead_list.name)
+        self.by_tag.setdefault(tag, {})[slug] = lead_list.list_id
+        self.by_slug.setdefault(slug, []).append(lead_list.list_id)
+
+    def _ensure_fresh(self):
+        with self.lock:
+            if self.built_at is not None and time.monotonic() - self.built_at < self.ttl:
+                return
+            self.lists, self.by_tag, self.by_slug = {}, {}, {}
+            for data in paginator.iter_items(LEAD_LISTS_URL, {"api_key":API}, 'leads_lists'):
+                self._add(LeadList(list_id=data["id"], name=data["name"], num_leads=data['leads_count']))
+            self.built_at = time.monotonic()
+
+    def invalidate(self):
+        with self.lock:
+            self.built_at = None
+
+    def added(self, lead_list):
+        """record a newly created list without refetching"""
+        with self.lock:
+            if self.built_at is not None:
+                self._add(lead_list)
+
+    def removed(self, list_id):
+        """drop a deleted list without refetching"""
+        with self.lock:
+            lead_list = self.lists.pop(list_id, None)
+            if lead_list:
+                tag, slug = self.split_name(lead_list.name)
+                self.by_tag.get(tag, {}).pop(slug, None)
+                if list_id in self.by_slug.get(slug, []):
+                    self.by_slug[slug].remove(list_id)
+
+    def find(self, keyword):
+        """{slug: list_id} for every list whose name contains keyword (same matching get_lead_list_ids always used)"""
+        self._ensure_fresh()
+        return {self.split_name(l.name)[1]: l.list_id for l in list(self.lists.values()) if keyword in l.name}
+
+    def for_tag(self, tag):
+        """{slug: list_id} for lists tagged exactly `tag`"""
+        self._ensure_fresh()
+        return dict(self.by_tag.get(tag, {}))
+
+    def for_slug(self, slug):
+        """every LeadList belonging to admin `slug`"""
+        self._ensure_fresh()
+        return [self.lists[i] for i in self.by_slug.get(slug, [])]
+
+    def get(self, tag, slug):
+        """list id for (tag, admin slug), or None"""
+        self._ensure_fresh()
+        return self.by_tag.get(tag, {}).get(slug)
 
-        good_leads = [x for x in domain_leads if x.good]
-        if good_leads:
-            leads_to_keep.append(good_leads[0])
+def filter_generics(HunterResults):
+    """filters Hunter leads to remove "bad generics" and returns updated list of results
+       (one lead per domain: first good lead if there is one, otherwise the domain's first lead)"""
+    # Updated 3/27/2023...removed most 'good generics' and now filtering out all that do not have a first_name
+    keep, good = lead_filter.pick_leads(lead_filter.results_frame(HunterResults))
+    for lead, is_good in zip(HunterResults, good.tolist()):
+        if lead.account:
+            lead.good = is_good
+    return [HunterResults[i] for i in keep]
+
+def needs_verification(result, compare_date):
+    """True if lead has no verification or its verification is older than compare_date (invalid leads are never re-checked)"""
+    # during Domain Search, if Hunter has already verified lead, it will have verification info, but may not be up to date
+    if result.verification_status == "invalid": # assuming anything already invalid will stay invalid. Skip.
+        return False
+    if not result.verification_status or not result.verification_date:
+        return True
+    # converts string time to date object in same format
+    verify_date = datetime.datetime.strptime(str(result.verification_date), '%Y-%m-%d').date()
+    return verify_date <= compare_date
+
+def apply_verification(result, new_verification, verified_on=None):
+    """updates HunterResult with Email Verifier result (status, deliverability, score) and sets result.good"""
+    verify_status, deliverability, confidence = new_verification[0], new_verification[1], new_verification[2]
+    result.verification_status = verify_status
+    result.confidence = confidence
+    result.verification_date = verified_on or datetime.date.today().strftime('%Y-%m-%d') #updates verify date to string representing today
+    if deliverability == "deliverable": # Email Verifier actually tests deliverability, which supercedes status+confidence
+        result.good = True
+    if deliverability == "risky": # if risky, check confidence score and verify a first name exists
+        if confidence >= 80 and result.first_name:
+            result.good = True
         else:
-            leads_to_keep.append(domain_leads[0])
-    return leads_to_keep
+            result.good = False
+    if deliverability == "undeliverable":
+        result.good = False
 
-def verification_filter(HunterResults):
+def verification_filter(HunterResults, workers=8):
     """Loops through all Hunter Domain Search results and looks for unverified emails
-       if email needs verification, runs verify_email function and updates results.
+       if email needs verification, runs it through the verify_emails worker pool and updates results.
        will return newly fitlered list of HunterResult objects"""
-    compare_date = datetime.date.today() - datetime.timedelta(days=182) # date object representing today minus 6 months
+    compare_date = datetime.date.today() - datetime.timedelta(days=VERIFICATION_CACHE.max_age_days) # date object representing today minus 6 months
     print('\nFiltering and veryifying email addresses...')
-    count = 0
-    for result in tqdm(HunterResults):
-        # during Domain Search, if Hunter has already verified lead, it will have verification info, but may not be up to date
+    to_verify = []
+    for result in HunterResults:
+        # verification store is checked first -- anything verified recently (in any campaign) is never verified again
+        stored = VERIFICATION_CACHE.get(result.email)
+        if stored and stored.result:
+            apply_verification(result, (stored.status, stored.result, stored.score), verified_on=stored.date)
+            continue
+        if stored and stored.date > str(result.verification_date or ''):
+            result.verification_status, result.verification_date = stored.status, stored.date
+        elif result.verification_status and result.verification_date: # remember Hunter's own verification for next time
+            VERIFICATION_CACHE.put(result.email, result.verification_status, date=result.verification_date)
         # first check: if no verification exists (None) or is older than 6 months, run Verifier
-        if result.verification_date:
-            # converts string time to date object in same format
-            verify_date = datetime.datetime.strptime(result.verification_date, '%Y-%m-%d').date()
-        else:
-            verify_date = None
-        if not result.verification_status or verify_date <= compare_date: 
-            if result.verification_status == "invalid": # assuming anything already invalid will stay invalid. Skip. 
-                result.good = False
-                continue
-            new_verification = verify_email(result.email) # verify_email function runs Hunter Email Verifier
-            count+=1
-            print(f'\nVerifying {result.email}...')
-            if new_verification: # checks if verify_email returns a result
-                verify_status, deliverability, confidence = new_verification[0], new_verification[1], new_verification[2]
-            else: # if it does not, skip this email
-                continue
-            result.verification_status = verify_status
-            result.confidence = confidence
-            result.verification_date = datetime.date.today().strftime('%Y-%m-%d') #updates verify date to string representing today
-            if deliverability == "deliverable": # Email Verifier actually tests deliverability, which supercedes status+confidence
-                result.good = True
-            if deliverability == "risky": # if risky, check confidence score and verify a first name exists
-                if confidence >= 80 and result.first_name:
-                    result.good = True
-                else:
-                    result.good = False
-            if deliverability == "undeliverable":
-                result.good = False
+        if needs_verification(result, compare_date):
+            to_verify.append(result)
+        elif result.verification_status == "invalid":
+            result.good = False
         elif result.verification_status == 'valid' and result.first_name: # if verified within 6 months and valid, lead is good
             result.good = True
         elif result.verification_status == 'accept_all': # if server is catchall, remove
@@ -99,7 +179,14 @@ def verification_filter(HunterResults):
             result.good = False
         else:
             result.good = False # in all other cases (unknown status, low confidence, etc) remove leads
-    print(f'\nSuccess! {count} emails verified.')
+    verifications = verify_emails(list(dict.fromkeys(x.email for x in to_verify)), workers=workers)
+    for email, (verify_status, deliverability, confidence) in verifications.items():
+        VERIFICATION_CACHE.put(email, verify_status, deliverability, confidence)
+    for result in to_verify:
+        if verifications.get(result.email): # if verifier did not return a result, leave this email as is
+            apply_verification(result, verifications[result.email])
+    print(f'\nSuccess! {len(verifications)} emails verified.')
+    print(VERIFICATION_CACHE)
     leads_to_keep = [x for x in HunterResults if x.good]
     print(f'\nFound {len(leads_to_keep)} verifiable leads of {len(HunterResults)}')
     # Testing... 
@@ -110,26 +197,63 @@ def verification_filter(HunterResults):
     # End Testing
     return leads_to_keep
 
-def verify_email(email):
-    """verfies email address deliverability via Hunter Email Verifier"""
-    URL = "https://api.hunter.io/v2/email-verifier"
+VERIFIER_URL = "https://api.hunter.io/v2/email-verifier"
+VERIFICATION_PENDING = "pending" # verify_email return value when Hunter answers 202 (verification still in progress)
+
+def verify_email(email, limiter=HUNTER_VERIFIER_LIMITER, url=VERIFIER_URL):
+    """verfies email address deliverability via Hunter Email Verifier. returns (status, result, score) tuple,
+       VERIFICATION_PENDING if Hunter is still verifying (202), or None on failure"""
     PARAMS = {"email":email, "api_key":API}
     try:
-        response = requests.get(URL, PARAMS, timeout=30)
-        print(f'{response.status_code}: {response.reason}')
-        data = response.json()
+        response = http_client.get(url, PARAMS, limiter=limiter, timeout=(5, 30))
+        if response.status_code == 202:
+            return VERIFICATION_PENDING
         if response.status_code != 200:
-            pass
-        else:
-            verify_status = data['data']['status']
-            confidence = data['data']['score']
-            result = data['data']['result']
-            return (verify_status, result, confidence) # returns tuple with gathered data
-        
+            print(f'\nError! Could not verify {email}. Reason {response.status_code}: {response.reason}')
+            return None
+        data = response.json()
+        verify_status = data['data']['status']
+        confidence = data['data']['score']
+        result = data['data']['result']
+        return (verify_status, result, confidence) # returns tuple with gathered data
+    except QuotaExceeded:
+        raise # out of credits -- every further request would fail too
     except Exception as e:
         print(e)
-    
-    
+        return None
+
+def verify_emails(emails, workers=8, retry_after=10, max_pending_retries=6, limiter=HUNTER_VERIFIER_LIMITER, url=VERIFIER_URL):
+    """verifies many emails with up to `workers` verifier requests in flight (sharing the verifier rate limiter).
+       emails Hunter is still verifying (202) are re-queued for `retry_after` seconds later while the rest keep going.
+       returns dict of {email: (status, result, score)} for every email that got a result"""
+    verifications = {}
+    queue = [(0.0, 0, email) for email in emails] # heap of (not before time, attempt #, email)
+    heapq.heapify(queue)
+    in_flight = {}
+    progress = tqdm(total=len(emails))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while queue or in_flight:
+            now = time.monotonic()
+            while queue and queue[0][0] <= now and len(in_flight) < workers:
+                _, attempt, email = heapq.heappop(queue)
+                in_flight[executor.submit(verify_email, email, limiter, url)] = (attempt, email)
+            # wake up when a request finishes or the next pending retry is due, whichever is first
+            timeout = max(queue[0][0] - now, 0) if queue and len(in_flight) < workers else None
+            if not in_flight:
+                time.sleep(timeout)
+                continue
+            done, _ = wait(in_flight, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                attempt, email = in_flight.pop(future)
+                result = future.result()
+                if result == VERIFICATION_PENDING and attempt < max_pending_retries:
+                    heapq.heappush(queue, (time.monotonic() + retry_after, attempt+1, email))
+                    continue
+                if result and result != VERIFICATION_PENDING:
+                    verifications[email] = result
+                progress.update(1)
+    progress.close()
+    return verifications
 
 # BROKEN AF
 def search_leads(lead_list_tag=None, admin_slug=None, industry=None, uncontacted=False, limit=100):
@@ -149,7 +273,7 @@ def search_leads(lead_list_tag=None, admin_slug=None, industry=None, uncontacted
     # if admin_slug:
     #     PARAMS['for_user'] = admin_slug
     try:
-        response = requests.get(URL, PARAMS, timeout=60)
+        response = http_client.get(URL, PARAMS)
         print(response.status_code)
         print(response.text)
         leads = response['data']['leads']
@@ -160,37 +284,24 @@ def search_leads(lead_list_tag=None, admin_slug=None, industry=None, uncontacted
     except Exception as e:
         print(e)
 
+LEAD_LISTS_URL = "https://api.hunter.io/v2/leads_lists"
+
 def get_lead_lists(keyword=None, retrieve_all=False, count=False):
     """creates array of LeadList class objects from Hunter API call
-       optionally, takes Keyword argunment to search for specific lists"""
-    URL = "https://api.hunter.io/v2/leads_lists"
-    offset=0 # offset determines # to skip (like clicking next page). will be incremented if no result found to search next 100
+       optionally, takes Keyword argunment to search for specific lists. unless retrieve_all is True,
+       a keyword search stops at the first page with a match"""
     lead_lists = []
-    while True:
-        PARAMS = {"limit":100, "api_key":API, "offset":offset}   
-        request = requests.get(URL, PARAMS)
-        result = request.json()
-        print(result)
-        data = result['data']['leads_lists']
-        num_lead_lists = result["meta"]["total"]
-        for i in range(len(data)): # pylint: disable=all
-            list_id = data[i]["id"]
-            list_name = data[i]["name"]
-            if keyword and keyword not in list_name: # skip if search term not found in list name
+    for page in paginator.iter_pages(LEAD_LISTS_URL, {"api_key":API}, 'leads_lists'):
+        for data in page:
+            if keyword and keyword not in data["name"]: # skip if search term not found in list name
                 continue
-            else: # if found, create LeadList object and append to array
-                lead_lists.append(LeadList(
-                    list_id = list_id,
-                    name=list_name,
-                    num_leads=data[i]['leads_count']
-                ))
-        # if no result fount, or if retrieve_all is True increase offset and continue loop
-        if retrieve_all or not lead_lists:
-            offset += 100
-        # STOP CONDITIONS / INF LOOP PROTECTION...
-        # stop count = floor division to determine number of loops to run...
-        stop_count = (num_lead_lists//100)*100+100 # +100 to ensure loop runs once more before terminating
-        if offset == stop_count or len(lead_lists) == num_lead_lists:
+            # if found, create LeadList object and append to array
+            lead_lists.append(LeadList(
+                list_id=data["id"],
+                name=data["name"],
+                num_leads=data['leads_count']
+            ))
+        if keyword and lead_lists and not retrieve_all:
             break
 
     if count: # if cunt is True, returns # of leads in returned lists instead of array of LeadList objects
@@ -201,30 +312,15 @@ def get_lead_lists(keyword=None, retrieve_all=False, count=False):
     else:
         return lead_lists # returns array of LeadList objects
 
+LEAD_LIST_INDEX = LeadListIndex()
+
 def get_lead_list_ids(tag):
-    """returns lead list ids based on tag/scrape name. optionally accepts admin slug as arg to narrow search"""
-    offset=0 # offset determines # to skip (like clicking next page). will be incremented if no result found to search next 100
+    """returns lead list ids based on tag/scrape name. served from LEAD_LIST_INDEX (no API call once built)"""
     lead_list_ids = {}
-    while True:
-        URL = "https://api.hunter.io/v2/leads_lists"
-        try: 
-            PARAMS = {"limit":100, "api_key":API, "offset":offset}  
-            request = requests.get(URL, PARAMS)
-            result = request.json()
-            lead_lists = result['data']['leads_lists']
-            num_lead_lists = result['meta']['total']
-            stop_count = (num_lead_lists//100)*100+100 # +100 to ensure loop runs once more before terminating
-            for lead_list in lead_lists:
-                if tag in lead_list["name"]:
-                    lead_id = lead_list["id"]
-                    admin_slug = lead_list["name"].split(' ')[-1]
-                    lead_list_ids[admin_slug] = lead_id
-            if offset < stop_count:
-                offset+=100
-            else:
-                break
-        except Exception as e:
-            print(e)
+    try:
+        lead_list_ids = LEAD_LIST_INDEX.find(tag)
+    except Exception as e:
+        print(e)
         
     if len(lead_list_ids.keys()) > 1: # if more than one result, return dict of names/ids
         return lead_list_ids
@@ -237,7 +333,7 @@ def create_leads_list(name):
        returns Lead List id of resulting list"""
     URL = "https://api.hunter.io/v2/leads_lists"
     PARAMS = {"name":name, "api_key":API}
-    response = requests.post(URL, PARAMS, timeout=30)
+    response = http_client.post(URL, PARAMS)
     print(response.reason)
     print(response.status_code)
     if response.status_code == 201:
@@ -248,6 +344,7 @@ def create_leads_list(name):
             num_leads=response['data']['leads_count']
             )
         print(f'\nSuccess! Lead List created.\nName: {new_list.name} / ID: {new_list.list_id}')
+        LEAD_LIST_INDEX.added(new_list)
         return new_list.list_id
     else:
         raise Exception('\nError! Failed to create lead list (duplicate?)')
@@ -255,9 +352,10 @@ def create_leads_list(name):
 def delete_leads_list(id):
     url = f'https://api.hunter.io/v2/leads_lists/{id}?api_key={API}'
     # params = {'id':id, "api_key":API}
-    response = requests.delete(url)
+    response = http_client.delete(url)
     if response.status_code == 204 or response.status_code == 202:
         print(f'\nSuccess! Lead List deleted.')
+        LEAD_LIST_INDEX.removed(id)
     else:
         print(f'\nError! Failed to delete Lead List...\nReason: ({response.status_code}){response.reason}')
     utils.clear_screen()
@@ -267,12 +365,14 @@ def bulk_delete_lead_lists(tag):
     if lead_list_ids:
         for l in tqdm(lead_list_ids.values()):
             delete_leads_list(l)
+        LEAD_JOURNAL.forget(tag) # leads went with the lists, so a re-upload must send them again
         print(f'\nDeleted {len(lead_list_ids)} lead lists.')
     else:
         print('\nError! No lead lists found')
         
-def create_lead(HunterResult, list_id, TAG=None, update=False):
-    """creates leads from HunterResult class objescts and POSTs to Hunter.io via API request"""
+def create_lead(HunterResult, list_id, TAG=None, update=False, lead_id=None):
+    """creates leads from HunterResult class objescts and POSTs to Hunter.io via API request.
+       returns Hunter lead id on success (True if updated without a known id), None on failure"""
     if not list_id:
         raise KeyError('\nError! Must include a lead list id.')
     PARAMS = {
@@ -299,23 +399,26 @@ def create_lead(HunterResult, list_id, TAG=None, update=False):
     }
 
     URL = 'https://api.hunter.io/v2/leads'
-    if update: # if Update is true, sends PUT request to update lead
+    if update: # if Update is true, sends PUT request to update lead (by id if we know it)
         try: 
-            response = requests.put(URL, json=PARAMS, timeout=30)
-            print(f'{response.status_code}: {response.reason}')
-            if response.status_code not in [200, 201]:
+            response = http_client.put(f'{URL}/{lead_id}' if lead_id else URL, json=PARAMS)
+            if response.status_code not in [200, 201, 204]:
                 print(f'\nError! Lead was not updated.\nReason {response.status_code}: {response.reason}')
+                return None
+            return lead_id or True
         except Exception as e:
             print(e)
-            pass
+            return None
     else: # otherwise, sends POST request to create
         try: 
-            response = requests.post(URL, json=PARAMS, timeout=30)
+            response = http_client.post(URL, json=PARAMS)
             if response.status_code not in [200, 201]:
                 print(f'\nError! Lead was not created.\nReason {response.status_code}: {response.reason}')
+                return None
+            return response.json()['data']['id']
         except Exception as e:
             print(e)
-            pass
+            return None
 
 def bulk_lead_list_create(TAG, ADMINS=None):
     """create lead lists in Hunter for each admin w/ supplied tag"""
@@ -332,33 +435,83 @@ def bulk_lead_list_create(TAG, ADMINS=None):
         # utils.clear_screen()
     return lead_list_ids
 
-def bulk_lead_create(TAG, hunter_results, ADMINS=None, update=False):
+def reconcile_pending(TAG, journal=LEAD_JOURNAL):
+    """settles leads journaled as pending by an interrupted run: those found in their Hunter lead list are marked
+       created, the rest are dropped from the journal so they get sent again. returns # of leads found"""
+    pending = journal.pending(TAG)
+    if not pending:
+        return 0
+    print(f'\nChecking {len(pending)} leads left pending by the last upload...')
+    found = 0
+    for list_id in set(pending.values()):
+        try:
+            in_list = {lead['email']: lead['id'] for lead in paginator.iter_items(
+                'https://api.hunter.io/v2/leads', {"api_key": API, "leads_list_id": list_id}, 'leads', limit=1000)}
+        except Exception as e:
+            print(e) # can't tell what made it -- leave them pending for the next run
+            continue
+        for email in [email for email, pending_list in pending.items() if pending_list == list_id]:
+            if email in in_list:
+                journal.record(TAG, email, list_id, in_list[email])
+                found += 1
+            else:
+                journal.discard(TAG, email)
+    return found
+
+def bulk_lead_create(TAG, hunter_results, ADMINS=None, update=False, workers=8, journal=LEAD_JOURNAL):
     """create leads in Hunter and assigns them to already created leads lists.
-       this is the same as in main cold_out script, but writing separately
-       to upload csv backup if needed"""
+       up to `workers` requests run at once. every lead is journaled as pending before it's sent and as created
+       once Hunter accepts it, so leads already created under this TAG are skipped and an interrupted upload can
+       simply be re-run (pending leads are first checked against their lead list, see reconcile_pending).
+       with update=True, journaled leads are updated in place (by Hunter id) instead"""
     print('\nGathering data...')
     if not ADMINS:
         ADMINS = admins.get_admins(exclude_RM=True)
     print('\nCreating Leads in Hunter...')
     admin_slugs = set(admin.slug for admin in ADMINS)
     lead_list_ids = get_lead_list_ids(TAG) # returns dict of admin.slug / list id pairs OR single 
-    count = len(hunter_results)
-    for lead in tqdm(hunter_results):
+    if not update:
+        reconcile_pending(TAG, journal)
+    already_created = journal.created(TAG)
+    if update:
+        to_send = hunter_results
+    else:
+        to_send = [x for x in hunter_results if x.email not in already_created]
+        print(f'\n{len(hunter_results)-len(to_send)} leads already uploaded for {TAG}, skipping.')
+
+    def upload(lead):
         admin_slug = lead.account.owner.email.split('@')[0]
-        # handling for if only one lead list is found (integer returned vs. dict)
-        if type(lead_list_ids) == int:
-            lead_list_id = lead_list_ids
-        else:
-            lead_list_id = lead_list_ids[admin_slug]
         # Testing...
         if admin_slug not in admin_slugs:
             print('REKT')
-            continue
-        if update:
-            create_lead(lead, lead_list_id, update=True)
+            return False
+        # handling for if only one lead list is found (integer returned vs. dict)
+        if type(lead_list_ids) == int:
+            lead_list_id = lead_list_ids
         else:
-            create_lead(lead, lead_list_id)
-    print(f'\nSuccess! {count} leads created.')
+            lead_list_id = (lead_list_ids or {}).get(admin_slug)
+            if not lead_list_id:
+                print(f'\nError! No {TAG} lead list found for {admin_slug}.')
+                return False
+        if not update:
+            journal.begin(TAG, lead.email, lead_list_id)
+        lead_id = create_lead(lead, lead_list_id, update=update, lead_id=already_created.get(lead.email))
+        if lead_id and not update:
+            journal.record(TAG, lead.email, lead_list_id, lead_id)
+        return bool(lead_id)
+
+    created = errors = 0
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        progress = tqdm(executor.map(upload, to_send), total=len(to_send))
+        for ok in progress:
+            created += ok
+            errors += not ok
+            progress.set_postfix(errors=errors, rate=f'{(created+errors)/max(time.monotonic()-start, 1e-9):.1f}/s')
+    elapsed = time.monotonic() - start
+    print(f'\nSuccess! {created} leads {"updated" if update else "created"} in {elapsed:.1f}s ({created/max(elapsed, 1e-9):.1f}/s).')
+    if errors:
+        print(f'\n{errors} of {len(to_send)} uploads failed ({errors/len(to_send):.1%}). Re-run to retry just those leads.')
 
 def reassign_leads_list(current_list_id, new_list_keyword):
     # get all leads from current list
@@ -369,7 +522,7 @@ def reassign_leads_list(current_list_id, new_list_keyword):
     def get_leads_to_move(current_list_id, offset):
         try:
             lead_list_url = f"https://api.hunter.io/v2/leads_lists/{current_list_id}"
-            response = requests.get(lead_list_url, {"api_key":API, "limit":100, "offset":offset}, timeout=30)
+            response = http_client.get(lead_list_url, {"api_key":API, "limit":100, "offset":offset})
             # print(f'{response.status_code}: {response.reason}')
             data = response.json()
             leads_count = data["data"]["leads_count"]
@@ -401,7 +554,7 @@ def reassign_leads_list(current_list_id, new_list_keyword):
         lead_url = f'https://api.hunter.io/v2/leads/{lead_id}'
         params = {"api_key":API, "leads_list_id":new_list_id}
         try:
-            response = requests.put(lead_url, params, timeout=60)
+            response = http_client.put(lead_url, params)
             print(f'{response.status_code}: {response.reason}')
         except Exception as e:
             print(e)
@@ -418,7 +571,7 @@ def delete_lead(lead_id):
     """deletes a lead in Hunter based on lead id"""
     URL = f"https://api.hunter.io/v2/leads/{lead_id}"
     try:
-        response = requests.delete(URL, {"api_key":API}, timeout=30)
+        response = http_client.delete(URL, params={"api_key":API})
         if response.status_code != 204:
             print(f'\nError! Lead not deleted. Reason: {response.reason}')
         else:
@@ -433,49 +586,36 @@ def count_leads(monthly=True):
     tags = [x.strip() for x in tag_response.split(',')]
     lead_list_ids = []
     for t in tags:
-        lead_list_ids += (list(get_lead_list_ids(t).values()))
+        ids = get_lead_list_ids(t) # dict, single id, or None
+        lead_list_ids += list(ids.values()) if type(ids) == dict else [ids] if ids else []
     
     num_leads = 0
-    limit = 1000 # of leads to return per query -- 1000 is max
+    thirty_days_ago = datetime.datetime.now() - datetime.timedelta(30)
     url = "https://api.hunter.io/v2/leads"
+    print("\nCounting leads...")
     for list_id in tqdm(lead_list_ids):
-        offset = 0
-        print("\nCounting leads...")
-        while True:
-            params = {"api_key": API, "limit":limit, "offset":offset, "leads_list_id":list_id}
-            try:
-                response = requests.get(url, params, timeout=60)
-                data = response.json()
-                leads = data['data']['leads']
-                count = data['meta']['count']
-                total = data['meta']['total']
-                # print(f'Current # leads: {len(leads)}\nCount: {count}')
-                for lead in leads:
-                    thirty_days_ago = datetime.datetime.now() - datetime.timedelta(30)
-                    upload_date = datetime.datetime.strptime(lead['created_at'], "%Y-%m-%d %H:%M:%S %Z")
-                    if monthly and upload_date <= thirty_days_ago:
-                        num_leads += 1
-                    elif not monthly:
-                        num_leads += 1
-                offset+=limit
-                stop_count = (count//10)*10+1000
-                if offset >= stop_count:
-                    break
-
-                    
-            except Exception as e:
-                print(e)
-                continue
+        params = {"api_key": API, "leads_list_id":list_id}
+        try:
+            # limit = # of leads to return per query -- 1000 is max
+            for lead in paginator.iter_items(url, params, 'leads', limit=1000):
+                upload_date = datetime.datetime.strptime(lead['created_at'], "%Y-%m-%d %H:%M:%S %Z")
+                if monthly and upload_date <= thirty_days_ago:
+                    num_leads += 1
+                elif not monthly:
+                    num_leads += 1
+        except Exception as e:
+            print(e)
+            continue
     return num_leads
 
-test = count_leads()
-print(test)
+# test = count_leads()
+# print(test)
 
 def upload_from_csv_backup(TAG, PATH):
     """uploads leads to Hunter from backup CSV file (for upload errors)"""
     HUNTER_RESULTS = results_from_csv(PATH)
     # print(HUNTER_RESULTS)
-    bulk_lead_create(TAG, HUNTER_RESULTS, update=True)
+    bulk_lead_create(TAG, HUNTER_RESULTS) # journal skips every lead the failed run already created
 
 # TAG = "det"
 # path = 'backup_csvs/lead_backup_det.csv'
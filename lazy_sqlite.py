@@ -0,0 +1,31 @@
+"""
+Shared SQLite helper for the on-disk caches (domain searches, verifications, addresses, lead journal, ...).
+The connection is only opened the first time it's needed, so importing a module that defines a cache singleton
+doesn't create folders or database files.
+"""
+
+import threading
+import sqlite3
+import os
+
+
+class LazyConnection:
+    """sqlite3 connection opened on first use (creating its folder + running the schema statements). the
+       connection is shared between threads; callers still serialize their queries with their own lock"""
+    def __init__(self, path, *schema):
+        self.path = path
+        self.schema = schema
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        with self._lock:
+            if self._conn is None:
+                if os.path.dirname(self.path):
+                    os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                conn = sqlite3.connect(self.path, check_same_thread=False)
+                with conn:
+                    for statement in self.schema:
+                        conn.execute(statement)
+                self._conn = conn
+            return self._conn
@@ -0,0 +1,45 @@
+"""
+Column-wise lead filtering for Hunter Domain Search results. Replaces the per-domain rescans in filter_generics
+(O(domains x leads)) with boolean masks + one grouping pass over a DataFrame view of the results.
+"""
+
+import pandas as pd
+import numpy as np
+import re
+
+BAD_GENERICS = ["info", "hello", "team", "help", "contact"]
+GOOD_VERIFY = ['valid', 'accept_all']
+BAD_GENERIC_PATTERN = '(?:' + '|'.join(re.escape(x) for x in BAD_GENERICS) + ')(?:@|$)' # slug (part before @) is a bad generic
+
+
+def results_frame(HunterResults):
+    """column view of the fields the filter rules need. row i == HunterResults[i]"""
+    return pd.DataFrame({
+        'domain': [x.account.domain if x.account else None for x in HunterResults],
+        'email': [x.email for x in HunterResults],
+        'verification_status': [x.verification_status for x in HunterResults],
+        'first_name': [x.first_name for x in HunterResults],
+    })
+
+
+def good_mask(df):
+    """True where lead passes all rules: slug not a bad generic, verification status ok, first name present"""
+    bad_slug = df['email'].astype(str).str.match(BAD_GENERIC_PATTERN)
+    has_first_name = df['first_name'].fillna('').astype(bool)
+    return (~bad_slug & df['verification_status'].isin(GOOD_VERIFY) & has_first_name).to_numpy()
+
+
+def pick_leads(df, good=None):
+    """returns (row positions of the lead to keep for each domain, good mask). keeps the first good lead per domain,
+       or the domain's first lead if none are good. domains are in order of first appearance"""
+    if good is None:
+        good = good_mask(df)
+    has_domain = df['domain'].notna().to_numpy()
+    codes, _ = pd.factorize(df['domain'], sort=False) # domain -> 0..k-1 in order of first appearance, NaN -> -1
+    positions = np.arange(len(df))
+    # np.unique's return_index gives the first position of each code, i.e. each domain's first (good) lead
+    _, first_any = np.unique(codes[has_domain], return_index=True)
+    keep = positions[has_domain][first_any]
+    good_codes, first_good = np.unique(codes[has_domain & good], return_index=True)
+    keep[good_codes] = positions[has_domain & good][first_good]
+    return keep, good
@@ -0,0 +1,59 @@
+"""
+Idempotency journal for lead uploads (SQLite). Every lead is written as 'pending' (tag + email + list) before it is
+POSTed to Hunter and marked 'created' with its Hunter lead id once the POST succeeds. bulk_lead_create checks it
+before sending, so a restarted upload picks up exactly where the last run stopped. A lead still 'pending' on resume
+may or may not have reached Hunter (crash or timeout mid-request), so it's reconciled against its lead list
+instead of being blindly re-sent -- the same lead is never created twice.
+"""
+
+from lazy_sqlite import LazyConnection
+import threading
+import datetime
+
+JOURNAL_PATH = 'cache/lead_journal.db'
+PENDING = 'pending'
+CREATED = 'created'
+
+
+class LeadJournal:
+    """SQLite-backed upload journal. safe to share between threads"""
+    def __init__(self, path=JOURNAL_PATH):
+        self.lock = threading.Lock()
+        self.db = LazyConnection(path, '''CREATE TABLE IF NOT EXISTS leads (tag TEXT NOT NULL, email TEXT NOT NULL, list_id INTEGER,
+                                          hunter_id INTEGER, created_at TEXT NOT NULL, status TEXT NOT NULL, PRIMARY KEY (tag, email))''')
+
+    @property
+    def conn(self):
+        return self.db.get()
+
+    def created(self, tag):
+        """{email: hunter lead id} for every lead already uploaded under tag"""
+        with self.lock:
+            return dict(self.conn.execute('SELECT email, hunter_id FROM leads WHERE tag = ? AND status = ?', (tag, CREATED)).fetchall())
+
+    def pending(self, tag):
+        """{email: list id} for leads of tag that were about to be sent when the last run stopped"""
+        with self.lock:
+            return dict(self.conn.execute('SELECT email, list_id FROM leads WHERE tag = ? AND status = ?', (tag, PENDING)).fetchall())
+
+    def _write(self, tag, email, list_id, hunter_id, status):
+        with self.lock, self.conn:
+            self.conn.execute('INSERT OR REPLACE INTO leads VALUES (?, ?, ?, ?, ?, ?)',
+                              (tag, email, list_id, hunter_id, datetime.datetime.now().isoformat(timespec='seconds'), status))
+
+    def begin(self, tag, email, list_id):
+        """journals the lead as pending -- call before the POST"""
+        self._write(tag, email, list_id, None, PENDING)
+
+    def record(self, tag, email, list_id, hunter_id):
+        self._write(tag, email, list_id, hunter_id, CREATED)
+
+    def discard(self, tag, email):
+        """drops a pending lead that never reached Hunter, so it's sent again"""
+        with self.lock, self.conn:
+            self.conn.execute('DELETE FROM leads WHERE tag = ? AND email = ? AND status = ?', (tag, email, PENDING))
+
+    def forget(self, tag):
+        """clears journal for tag (e.g. after bulk_delete_lead_lists, so a re-upload starts fresh)"""
+        with self.lock, self.conn:
+            self.conn.execute('DELETE FROM leads WHERE tag = ?', (tag,))
@@ -0,0 +1,72 @@
+"""
+Reusable paginator for Hunter list endpoints (leads_lists, leads, campaigns, recipients...). Reads meta.total from
+the first page, then fetches the remaining offsets concurrently. Endpoints that don't report a total are paged
+sequentially until a short page comes back.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import http_client
+
+
+def _get_page(url, params, offset, limit):
+    response = http_client.get(url, dict(params, offset=offset, limit=limit))
+    response.raise_for_status()
+    return response.json()
+
+
+def _items(page, items_key):
+    return page['data'][items_key]
+
+
+def _total(page):
+    meta = page.get('meta') or {}
+    return meta.get('total')
+
+
+def iter_pages(url, params, items_key, limit=100, workers=4):
+    """generator of item lists, one per page, in offset order. callers can start working on page 1 while the rest
+       are still downloading; breaking out of the loop cancels pages not yet requested"""
+    first = _get_page(url, params, 0, limit)
+    items = _items(first, items_key)
+    yield items
+    total = _total(first)
+    if total is None: # no total reported -- page sequentially until a short page
+        offset = 0
+        while len(items) == limit:
+            offset += limit
+            items = _items(_get_page(url, params, offset, limit), items_key)
+            yield items
+        return
+    executor = ThreadPoolExecutor(max_workers=workers)
+    try:
+        futures = [executor.submit(_get_page, url, params, offset, limit) for offset in range(limit, total, limit)]
+        for future in futures:
+            yield _items(future.result(), items_key)
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def iter_items(url, params, items_key, limit=100, workers=4):
+    """streams individual items across all pages"""
+    for items in iter_pages(url, params, items_key, limit, workers):
+        yield from items
+
+
+def fetch_all(url, params, items_key, limit=100, workers=4):
+    """list of every item across all pages"""
+    return list(iter_items(url, params, items_key, limit, workers))
+
+
+def count(url, params, items_key, limit=100):
+    """total number of items. one request if the endpoint reports meta.total"""
+    first = _get_page(url, params, 0, limit)
+    total = _total(first)
+    if total is not None:
+        return total
+    items = _items(first, items_key)
+    num_items, offset = len(items), 0
+    while len(items) == limit:
+        offset += limit
+        items = _items(_get_page(url, params, offset, limit), items_key)
+        num_items += len(items)
+    return num_items
@@ -3,79 +3,119 @@ from pprint import pprint as pr
 import numpy as np
 import pyinputplus as pyip
 import tldextract
-import math
+from tldextract.remote import lenient_netloc
+import functools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from tqdm import tqdm
 
-def format_result(url: str) -> str:
-    result = tldextract.extract(url)
+# offline extractor: no suffix_list_urls means it never goes to the network, it loads the public suffix snapshot
+# bundled with tldextract (once, on first use). cache_dir=None skips the on-disk cache, nothing to fetch anyway
+DOMAIN_EXTRACTOR = tldextract.TLDExtract(cache_dir=None, suffix_list_urls=(), fallback_to_snapshot=True)
+
+@functools.lru_cache(maxsize=None)
+def _domain_for_host(host: str) -> str:
+    result = DOMAIN_EXTRACTOR.extract_str(host)
     return f'{result.domain}.{result.suffix}'
 
+def format_result(url: str) -> str:
+    """registered domain of a website field, e.g. 'https://www.shop.foo.co.uk/about?x=1' -> 'foo.co.uk'.
+       scheme/path/port/www noise is stripped with plain string ops, the suffix lookup is memoized per host"""
+    return _domain_for_host(lenient_netloc(url))
+
+def format_results(urls: pd.Series) -> pd.Series:
+    """format_result over a whole column. each distinct url is formatted once, then broadcast back"""
+    codes, uniques = pd.factorize(urls)
+    formatted = np.array([format_result(x) for x in uniques] + [None], dtype=object)
+    result = formatted[codes]
+    missing = codes == -1
+    result[missing] = urls.to_numpy()[missing]
+    return pd.Series(result, index=urls.index, name=urls.name)
+
+# business name cleaning rules, applied in order. each rule cuts the name at the first occurrence of its separator
+NAME_RULES = [
+    ('parentheses', ' ('),
+    ('at', ' at'),
+    ('dash', ' - '),
+    ('at sign', ' @'),
+    ('comma llc', ', LLC'),
+    ('llc', ' LLC'),
+    ('pipe', ' | '),
+    ('colon', ': '),
+]
+
+def compile_name_rules(rules=NAME_RULES):
+    """compiles a rule table into one cleaning function (separators resolved once, cut with str.partition)"""
+    separators = tuple(sep for _, sep in rules)
+    def clean(name):
+        if type(name) != str:
+            return name
+        for sep in separators:
+            if sep in name:
+                name = name.partition(sep)[0]
+        return name
+    return clean
+
+_clean_name = compile_name_rules()
+
 def clean_name(name: str) -> str:
     """parses and formats business names to cleaner formats"""
-    if type(name) == str:
-        parenthesis = ' ('
-        new_name = name
-        if parenthesis in str(name):
-            new_name = name.split(parenthesis)[0]
-        if ' at' in str(new_name):
-            new_name = new_name.split(' at')[0]
-        if ' - ' in str(new_name):
-            new_name = new_name.split(' - ')[0]
-        if ' @' in str(new_name):
-            new_name = new_name.split(' @')[0]
-        if ', LLC' in str(new_name):
-            new_name = new_name.split(', LLC')[0]
-        if ' LLC' in str(new_name):
-            new_name = new_name.split(' LLC')[0]
-        if ' | ' in str(new_name):
-            new_name = new_name.split(' | ')[0]
-        if ': ' in new_name:
-            new_name = new_name.split(': ')[0]
-        return new_name
-    else:
-        return name
+    return _clean_name(name)
 
+def clean_names(names: pd.Series, rules=None) -> pd.Series:
+    """clean_name over a whole column in one pass. names are factorized first so each distinct name is cleaned
+       once (chains + repeat scrapes repeat a lot), then results are broadcast back with a numpy take"""
+    clean = compile_name_rules(rules) if rules else _clean_name
+    codes, uniques = pd.factorize(names)
+    cleaned = np.array([clean(x) for x in uniques] + [None], dtype=object)
+    result = cleaned[codes]
+    missing = codes == -1 # NaN names are left as they were
+    result[missing] = names.to_numpy()[missing]
+    return pd.Series(result, index=names.index, name=names.name)
 
-def parse_results(CSV_URL, existing_customer_filepath):
-    """Parses results CSV from Phantombuster...cleans up bad data, checks for duplicates, etc returns DataFrame of filtered results"""
-    ecdf = pd.read_csv(existing_customer_filepath)[['Email']]
-    existing_customer_domains = list(ecdf['Email'].apply(lambda x: str(x).split('@')[-1]))
-    tqdm.pandas() # registers tqdm to pandas methods for progress bar on operations below..
 
-    print('Reading data...') 
-    pbdf = pd.read_csv(CSV_URL)[['title','category','address','website',]]
-    pbdf.rename(columns={'title':'name'},inplace=True)
-    print('Removing listings without websites...')
-    pbdf.dropna(subset=['website'],inplace=True)
-    print('Cleaning names...')
-    pbdf['name'] = pbdf['name'].progress_apply(clean_name)
-    print('Cleaning URLs...')
-    pbdf['website'] = pbdf['website'].progress_apply(format_result)
-    print('Removing duplicate entries...')
-    pre = len(pbdf)
-    pbdf.drop_duplicates(subset=['website'],inplace=True)
-    post = len(pbdf)
-    print(f'Removed {pre-post} duplicates.')
-    print('Checking for existing customers...') 
-    pbdf['remove'] = pbdf['website'].progress_apply(lambda x: np.nan if x in existing_customer_domains else 'keep')
-    print('Removing existing customers...')
-    pbdf.dropna(subset=['remove'],inplace=True)
-    afterec = len(pbdf)
-    print(f'Removed {post-afterec} existing customers.')
-    # save_as = pyip.inputStr('Save as: \n')
+HUNTER_MAX_ROWS = 25000 # Hunter allows for a maximum of 25,000 rows per domain search upload
+READ_CHUNK_ROWS = 50000 # rows of the Phantombuster CSV held in memory at once
 
-    chunks = math.ceil(afterec/25000)
-    if chunks > 1:
-        print(f'Hunter allows for a maximum of 25,000 rows. Your file is being split into {chunks} CSVs.')
-        for chunk in tqdm(range(chunks)):
-            result = pbdf[chunk*25000:(chunk+1)*25000]
-            # chunked..to_csv(f'upload_to_hunter_domain_search/{save_as}_{chunk+1}.csv',index=False) **(original code, creates CSV)**
-    else:
-        result = pbdf
-        # pbdf.to_csv(f'upload_to_hunter_domain_search/{save_as}.csv',index=False)
-        # print(f'Saved as {save_as}.csv')
-    # print(f'Domains gathered: {len(pbdf)}') # **(original code, creates CSV)**
-    print('Done!')
-    return result # now returns either array of DataFrames or single DataFrame object
+def load_existing_customer_domains(existing_customer_filepath):
+    ecdf = pd.read_csv(existing_customer_filepath, usecols=['Email'])
+    return set(ecdf['Email'].apply(lambda x: str(x).split('@')[-1]))
 
+def parse_results(CSV_URL, existing_customer_filepath, chunksize=READ_CHUNK_ROWS):
+    """Parses results CSV from Phantombuster...cleans up bad data, checks for duplicates, etc returns DataFrame of filtered results.
+       the CSV is read in chunks of chunksize rows, so only the filtered rows of the whole file are held at once
+       (not every raw column of every listing). duplicates are dropped against a running seen-set, first occurrence wins"""
+    existing_customer_domains = load_existing_customer_domains(existing_customer_filepath)
+    seen = set() # every website already kept (or already dropped as existing customer)
+    kept = []
+    num_rows = no_website = duplicates = existing = 0
+    print('Reading data...')
+    reader = pd.read_csv(CSV_URL, usecols=['title','category','address','website'], chunksize=chunksize)
+    for chunk in tqdm(reader, unit='chunk'):
+        num_rows += len(chunk)
+        chunk = chunk[['title','category','address','website']].rename(columns={'title':'name'})
+        pre = len(chunk)
+        chunk = chunk.dropna(subset=['website'])
+        no_website += pre-len(chunk)
+        chunk['name'] = clean_names(chunk['name'])
+        chunk['website'] = format_results(chunk['website'])
+        is_dupe = chunk['website'].duplicated() | chunk['website'].isin(seen)
+        seen.update(chunk['website'])
+        is_customer = chunk['website'].isin(existing_customer_domains)
+        duplicates += int(is_dupe.sum())
+        existing += int((is_customer & ~is_dupe).sum())
+        kept.append(chunk[~is_dupe & ~is_customer])
+    print(f'Read {num_rows} listings. Removed {no_website} without websites, {duplicates} duplicates and {existing} existing customers.')
+    result = pd.concat(kept, ignore_index=True) if kept else pd.DataFrame(columns=['name','category','address','website'])
+    if len(result) > HUNTER_MAX_ROWS:
+        print(f'Hunter allows for a maximum of {HUNTER_MAX_ROWS:,} rows per upload. Your results have {len(result):,}.')
+    print('Done!')
+    return result
 
+def parse_result_files(paths, existing_customer_filepath, workers=None):
+    """parse_results for several local result CSVs, one file per process. DataFrames come back in paths order"""
+    # only fork-based pools are safe here: spawn (Windows) would re-import the calling script, prompts and all
+    if len(paths) > 1 and 'fork' in multiprocessing.get_all_start_methods():
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('fork')) as executor:
+            return list(executor.map(parse_results, paths, [existing_customer_filepath]*len(paths)))
+    return [parse_results(path, existing_customer_filepath) for path in paths]
@@ -0,0 +1,132 @@
+"""
+Splits one search url set across several idle Phantoms and launches them in parallel, so a sweep that takes a
+single Phantom ~5 hours finishes in a fraction of the wall-clock time. The shards are saved together as one job
+(cache/phantom_jobs/{TAG}.json), and "Continue existing scrape" collects the results of every shard for the tag.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from pydantic import BaseModel
+import datetime
+import itertools
+import csv
+import os
+import phantombuster as pb
+from google_api import upload_csv, SEARCH_URL_COLUMNS
+from scrape_history import SCRAPE_HISTORY, MINUTES_PER_SEARCH_URL
+import config
+
+JOBS_DIR = 'cache/phantom_jobs'
+MAX_RUNTIME_MINUTES = getattr(config, 'PHANTOM_MAX_RUNTIME_MINUTES', 360) # execution time limit of a single launch
+
+
+class Shard(BaseModel):
+    phantom_id: int
+    phantom_name: str
+    csv_name: str
+    csv_url: str | None = None
+    num_urls: int = 0
+    launched_at: datetime.datetime | None = None
+
+class ScrapeJob(BaseModel):
+    """one logical scrape for a tag, run as several Phantom shards"""
+    tag: str
+    created_at: datetime.datetime
+    shards: list[Shard] = []
+
+    def save(self, jobs_dir=JOBS_DIR):
+        os.makedirs(jobs_dir, exist_ok=True)
+        path = os.path.join(jobs_dir, f'{self.tag}.json')
+        with open(path + '.tmp', 'w') as f:
+            f.write(self.json(indent=2))
+        os.replace(path + '.tmp', path)
+
+    @classmethod
+    def load(cls, tag, jobs_dir=JOBS_DIR):
+        """saved job for tag, or None if the tag was scraped by a single Phantom"""
+        path = os.path.join(jobs_dir, f'{tag}.json')
+        return cls.parse_file(path) if os.path.exists(path) else None
+
+    def print_status(self, account):
+        running = {p.phantom_id for p in account.phantoms if p.is_running}
+        for shard in self.shards:
+            state = 'running' if shard.phantom_id in running else ('done' if shard.launched_at else 'not launched')
+            print(f'{shard.phantom_name} ({shard.phantom_id}): {shard.num_urls} urls, {state}')
+        num_running = sum(s.phantom_id in running for s in self.shards)
+        if num_running:
+            print(f'\n{num_running} of {len(self.shards)} shards are still running. Results will be partial.')
+
+    def result_csvs(self, workers=4):
+        """result csv urls of every launched shard, fetched concurrently"""
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(pb.fetch_results_csv, [s.phantom_id for s in self.shards if s.launched_at]))
+        return [url for urls in results if urls for url in urls]
+
+
+def pick_phantoms(account, num_shards):
+    """idle phantoms to run the shards, least recently updated first (same rule upload_search_urls uses for one)"""
+    idle = [p for p in account.phantoms if not p.is_running]
+    return sorted(idle, key=lambda p: p.last_updated or datetime.datetime.min)[:num_shards]
+
+def write_shards(search_urls, csv_files):
+    """deals (url, city, term) rows round-robin into one csv per shard, so every shard gets an even share of each
+       term and region. phantombuster only reports time left for the whole account, so there's no per-phantom
+       capacity to weigh shards by. files match write_search_urls_csv's format. returns rows per shard"""
+    handles = [open(path, 'w', newline='') for path in csv_files]
+    try:
+        writers = [csv.writer(f, lineterminator='\n') for f in handles]
+        for writer in writers:
+            writer.writerow(SEARCH_URL_COLUMNS)
+        counts = [0] * len(writers)
+        for i, row in zip(itertools.cycle(range(len(writers))), search_urls):
+            writers[i].writerow(row)
+            counts[i] += 1
+    finally:
+        for f in handles:
+            f.close()
+    return counts
+
+def launch_sharded_scrape(search_urls, TAG, num_shards, account=None):
+    """splits search_urls ((url, city, term) rows) across num_shards idle phantoms, uploads each shard's csv, and
+       launches them in parallel. returns the saved ScrapeJob, or None if no phantom is free"""
+    account = account or pb.get_user_info()
+    phantoms = pick_phantoms(account, num_shards)
+    if not phantoms:
+        print('\nError! Every Phantom is currently running. Try again later.')
+        return None
+    if len(phantoms) < num_shards:
+        print(f'\nOnly {len(phantoms)} Phantoms are idle. Splitting the scrape {len(phantoms)} ways.')
+    job = ScrapeJob(tag=TAG, created_at=datetime.datetime.now())
+    csv_names = [f'{TAG}-{i+1}_urls.csv' for i in range(len(phantoms))]
+    counts = write_shards(search_urls, [f'search_urls/{name}' for name in csv_names])
+
+    total_minutes = sum(counts) * MINUTES_PER_SEARCH_URL
+    longest_minutes = max(counts) * MINUTES_PER_SEARCH_URL
+    print(f'\n{sum(counts)} search urls split across {len(phantoms)} Phantoms. Estimated run time: {longest_minutes/60:.1f} hours '
+          f'(vs. {total_minutes/60:.1f} hours on one Phantom).')
+    if longest_minutes > MAX_RUNTIME_MINUTES:
+        print(f'Warning! Shards are longer than the {MAX_RUNTIME_MINUTES} minute launch limit and will need relaunching.')
+    if total_minutes > account.time_left / 60:
+        print(f'Warning! Estimated {total_minutes:.0f} minutes exceeds the account\'s remaining {account.time_left/60:.0f} minutes.')
+
+    for phantom, csv_name, count in zip(phantoms, csv_names, counts):
+        if not count:
+            continue
+        uploaded = upload_csv(f'search_urls/{csv_name}', csv_name) # Drive client isn't thread safe, uploads stay sequential
+        shard = Shard(phantom_id=phantom.phantom_id, phantom_name=phantom.name, csv_name=csv_name, num_urls=count)
+        if uploaded and pb.save_search_urls(phantom.phantom_id, *uploaded):
+            shard.csv_url = uploaded[0]
+        job.shards.append(shard)
+    job.save()
+
+    to_launch = [s for s in job.shards if s.csv_url]
+    with ThreadPoolExecutor(max_workers=max(len(to_launch), 1)) as executor:
+        launched = list(executor.map(pb.launch_phantom, [s.phantom_id for s in to_launch]))
+    for shard, result in zip(to_launch, launched):
+        if result == "Success":
+            shard.launched_at = datetime.datetime.now()
+            SCRAPE_HISTORY.record(f'search_urls/{shard.csv_name}', shard.launched_at.date())
+        else:
+            print(f'\nError! Could not launch {shard.phantom_name} ({shard.phantom_id}).')
+    job.save()
+    print(f'\n{sum(s.launched_at is not None for s in job.shards)} of {len(job.shards)} shards launched.')
+    return job
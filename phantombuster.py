@@ -5,19 +5,22 @@ Phantombuster Terminology Note: User = account/user/ugp, Agent = phantoms/crawls
 """
 
 # IMPORTS:
-from pydantic import BaseModel
-from tqdm import tqdm
+from pydantic import BaseModel, PrivateAttr
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 import pyinputplus as pyip
 import datetime
+import threading
+import time
 import json
-import requests
+import http_client
 import utils
 import config
 from google_api import get_csv_for_phantombuster
 
 # Getting API Key from config.py
 API = config.PHANTOMBUSTER_API
+ACCOUNT_TTL = 60 # seconds an account snapshot (phantoms + running state) is reused before fetching again
 
 class Phantom(BaseModel):
     """Creating Phantom class to store all Phantoms and related data on account"""
@@ -39,7 +42,7 @@ class Phantom(BaseModel):
             }
         payload = {"agentId":self.phantom_id,"mode":"finalized"} 
         try: 
-            response = requests.get(url, headers=headers, json=payload, timeout=30)
+            response = http_client.get(url, headers=headers, json=payload)
             utils.print_response(response)
             data = response.json()
             containers = data['containers']
@@ -57,6 +60,16 @@ class PhantomBusterAccount(BaseModel):
     time_left: int
     phantoms = []
     open_slots: int
+    fetched_at: float = 0
+    _by_token: dict = PrivateAttr(default_factory=dict) # lowercased name word -> first Phantom with that word
+    _indexed: int = PrivateAttr(default=-1) # len(phantoms) when _by_token was built
+
+    def index_phantoms(self):
+        self._by_token = {}
+        for p in self.phantoms:
+            for token in p.name.lower().split(" "):
+                self._by_token.setdefault(token, p)
+        self._indexed = len(self.phantoms)
 
     def __str__(self):
         return f'\nPhantombuster Account: {self.email}\nUsage time remaining: {self.time_left}'
@@ -66,23 +79,14 @@ class PhantomBusterAccount(BaseModel):
     def get_phantom_id(self, keyword=None):
         # returns Phantom id -- if optional keyword arg is supplied, will search that keyword.
         # otherwise, will return most recent phantom id
-        found = False
         if keyword:
-            for p in self.phantoms:
-                # print(p.name.lower())
-                if keyword in p.name.lower().split(" "):
-                    phantom_id = p.phantom_id
-                    found = True
-                    return phantom_id
-        else:
-            try: 
-                phantom_id = self.phantoms[0].phantom_id
-            except KeyError:
-                return 'Phantom not found!'
-        if found:
-            return phantom_id 
-        else:
-            return 'Phantom not found!'
+            if self._indexed != len(self.phantoms):
+                self.index_phantoms()
+            phantom = self._by_token.get(keyword)
+            return phantom.phantom_id if phantom else 'Phantom not found!'
+        if self.phantoms:
+            return self.phantoms[0].phantom_id
+        return 'Phantom not found!'
 
 
 
@@ -93,23 +97,43 @@ to decide the best way to implement into script
 --------------------------------------------------------------------------------------------------------
 """
 
-def get_user_info():
-    """Basic GET request to get account info. Primarily will be used for checking Usage time left."""
+_ACCOUNT = None
+_ACCOUNT_LOCK = threading.Lock()
+
+def get_user_info(refresh=False, workers=8):
+    """account info + every phantom. Primarily will be used for checking Usage time left.
+       returns the snapshot from the last call if it's under ACCOUNT_TTL seconds old (unless refresh=True)"""
+    global _ACCOUNT
+    with _ACCOUNT_LOCK:
+        if not refresh and _ACCOUNT and time.time() - _ACCOUNT.fetched_at < ACCOUNT_TTL:
+            return _ACCOUNT
+        _ACCOUNT = _fetch_user_info(workers)
+        return _ACCOUNT
+
+def invalidate_account():
+    """drops the account snapshot, e.g. after launching or updating a phantom"""
+    global _ACCOUNT
+    with _ACCOUNT_LOCK:
+        _ACCOUNT = None
+
+def _fetch_user_info(workers=8):
+    """Basic GET request to get account info, then every agent fetched concurrently"""
     user_url = "https://api.phantombuster.com/api/v1/user" # All Phantombuster API calls are done directly through URL
     headers = {
         "accept": "application/json",
         "X-Phantombuster-Key-1": API
     }
-    request = requests.get(user_url, headers=headers, timeout=30)
+    request = http_client.get(user_url, headers=headers)
     data = request.json()['data']
     # print(data)
-    account = PhantomBusterAccount(email=data['email'], time_left=data['timeLeft'], open_slots=15-len(data['agents']))
+    account = PhantomBusterAccount(email=data['email'], time_left=data['timeLeft'], open_slots=15-len(data['agents']), fetched_at=time.time())
     # Instantiating Phantom class members for each Agent (phantom) in Phantombuster account
     phantom_ids_and_status = []
     for agent in data['agents']:
         phantom_ids_and_status.append((agent['id'], agent['runningContainers'] > 0))
-    for phantom in phantom_ids_and_status:
-        phantom_data = fetch_phantom(phantom[0])
+    with ThreadPoolExecutor(max_workers=workers) as executor: # one round-trip per agent, in parallel
+        phantoms_data = list(executor.map(fetch_phantom, [phantom[0] for phantom in phantom_ids_and_status]))
+    for phantom, phantom_data in zip(phantom_ids_and_status, phantoms_data):
         account.phantoms.append(Phantom(
             phantom_id=phantom_data['id'],
             is_running=phantom[1],
@@ -119,6 +143,7 @@ def get_user_info():
             last_updated=phantom_data['updatedAt'],
             launch_type=phantom_data['launchType'],
         ))
+    account.index_phantoms()
     return account
 
 def fetch_phantom(phantom_id):
@@ -128,7 +153,7 @@ def fetch_phantom(phantom_id):
         "accept": "application/json",
         "X-Phantombuster-Key": API,
         }
-    response = requests.get(url, headers=headers, timeout=30).json()
+    response = http_client.get(url, headers=headers).json()
     # print(response)
     data = {
         "id":response['id'],
@@ -158,28 +183,35 @@ def upload_search_urls(csv_data, phantom_to_update=None):
                 phantom_to_update_id = phantom.phantom_id
                 phantom_to_update = phantom.name
     print(f'\nUploading csv to {phantom_to_update} phantom...')
+    save_search_urls(phantom_to_update_id, csv_url, csv_name)
+    return (phantom_to_update, phantom_to_update_id)
+
+def save_search_urls(phantom_id, csv_url, csv_name):
+    """points a phantom's argument at a search url spreadsheet. returns True if saved"""
     url = "https://api.phantombuster.com/api/v2/agents/save"
     headers = {
         "accept": "application/json",
         "X-Phantombuster-Key": API,
         }
-    payload={"id":str(phantom_to_update_id), "argument":{
+    payload={"id":str(phantom_id), "argument":{
         "spreadsheetUrl":csv_url,
         "csvName":csv_name,
         "numberOfResultsPerSearch":200,
         "columnName": "url"
         }}
     try:
-        response = requests.post(url, json=payload, headers=headers, timeout=60)
+        response = http_client.post(url, json=payload, headers=headers)
         print(f'{response.status_code}: {response.reason}')
+        invalidate_account() # phantom's updatedAt changed
         if response.status_code == 200:
             print('\nCSV uploaded succesfully!')
+            return True
         else:
             print(f'\nError! {response.status_code}: {response.reason}')
     except Exception as e:
         print(e)
         pass
-    return (phantom_to_update, phantom_to_update_id)
+    return False
 
 def launch_phantom(phantom_id):
     """launches phantom via phantom id"""
@@ -189,8 +221,9 @@ def launch_phantom(phantom_id):
         "X-Phantombuster-Key": API,
         }
     try:
-        response = requests.post(url, json={"id": str(phantom_id)}, headers=headers)
+        response = http_client.post(url, json={"id": str(phantom_id)}, headers=headers)
         utils.print_response(response)
+        invalidate_account() # running state changed
         if response.status_code == 200:
             return "Success"
     except Exception as e:
@@ -213,7 +246,7 @@ def fetch_phantom_output(TAG, phantom_id, fetch_all=False):
             stored_timestamp = None
         if stored_timestamp:
             payload["since"] = str(stored_timestamp)
-    response = requests.get(url, headers=headers, json=payload, timeout=30)
+    response = http_client.get(url, headers=headers, json=payload)
     utils.print_response(response)
     data = response.json()
     print(response.text)
@@ -242,72 +275,73 @@ def fetch_phantom_output(TAG, phantom_id, fetch_all=False):
 
 
 
-def fetch_results_csv(phantom_id, depth=1):
-    """Fetches results object(s) from specified phantom and returns CSV urls for each 'container' (results from scrape)
-       Optionally, takes depth as an argument to return multiple results files/urls"""
-    
-    def get_containers(phantom_id, depth):
-        """helper function to return container IDs from phantom which...contain...the results files in CSV and JSON
-           API call returns *all* containers, but depth specifies how many we get back"""
-        # API setup + GET request
-        url = f"https://api.phantombuster.com/api/v2/containers/fetch-all?agentId={phantom_id}"
-        headers = {"accept": "application/json","X-Phantombuster-Key-1": API}
-        response = requests.get(url, headers=headers, timeout=30).json() 
-        # Testing..
-        # df = pd.DataFrame(response) # pylint: disable=all
-        # df.to_json('testing_dump/fantom-allcontainer-test.json')
-        container_data = response['containers']
-        containers = []
-        i = 0
-        while i < depth: 
-            containers.append(container_data[i]['id'])
-            i+=1
-        return containers
+def list_containers(phantom_id):
+    """container ids for a phantom, newest first. one request"""
+    url = f"https://api.phantombuster.com/api/v2/containers/fetch-all?agentId={phantom_id}"
+    headers = {"accept": "application/json","X-Phantombuster-Key-1": API}
+    response = http_client.get(url, headers=headers).json()
+    return [c['id'] for c in response['containers']]
+
+def fetch_result_object(container_id):
+    """parsed results object of a container (None if the container has none)"""
+    url = f"https://api.phantombuster.com/api/v2/containers/fetch-result-object?id={container_id}"
+    headers = {
+        "accept": "application/json",
+        "X-Phantombuster-Key": API,
+        }
+    result = http_client.get(url, headers=headers).json().get('resultObject')
+    if isinstance(result, str): # the results object comes back as a JSON string inside the JSON response
+        try:
+            result = json.loads(result)
+        except ValueError:
+            pass
+    return result
+
+def csv_urls_in(result_object):
+    """every csv url anywhere in a parsed results object"""
+    if isinstance(result_object, str):
+        return [result_object] if result_object.startswith('http') and '.csv' in result_object else []
+    if isinstance(result_object, dict):
+        result_object = list(result_object.values())
+    if isinstance(result_object, list):
+        return [url for value in result_object for url in csv_urls_in(value)]
+    return []
+
+def fetch_results_csv(phantom_id, count=1, max_containers=6, workers=4):
+    """Returns CSV urls from the newest containers (results from scrape) of a phantom that have one. Lists the
+       containers once, then fetches result objects for the newest max_containers in parallel batches of `workers`,
+       stopping as soon as `count` containers with a CSV are found. None if no CSV in the newest max_containers"""
     if phantom_id == 'Phantom not found!':
         raise Exception('Error, no phantom id (Phantom not found)')
-    containers = get_containers(phantom_id, depth)
-    result_csvs = []
+    containers = list_containers(phantom_id)[:max_containers]
     print('\nGetting URLs...')
-    response_array = []
-    for i in tqdm(containers):
-        container_id = i
-        # another API call to return the results object for each container id
-        url = f"https://api.phantombuster.com/api/v2/containers/fetch-result-object?id={container_id}"
-        headers = {
-            "accept": "application/json",
-            "X-Phantombuster-Key": API,
-            }
-        response = requests.get(url, headers=headers, timeout=30).text
-        # print(response)
-        # most recent conatiner may not contain csv file. if found, splits string into array to isolate url
-        if 'csv' in response: 
-            response_array += response.split('"')
-    # finds url in split response array
-    if response_array:
-        for i in response_array:
-            if ".csv" in i:
-                csv_url = i.replace('\\', '') # two slashes because it reads one as interrupt, just removing extraneous char from the end
-                result_csvs.append(csv_url)
+    result_csvs, found = [], 0
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for i in range(0, len(containers), workers):
+            batch = containers[i:i+workers]
+            for container_id, result_object in zip(batch, executor.map(fetch_result_object, batch)):
+                urls = csv_urls_in(result_object)
+                if not urls:
+                    print(f'\nNo results csv found in container {container_id}. Checking next container...')
+                    continue
+                result_csvs += urls
+                found += 1
                 print("\nSuccess!")
-    else:
-        if depth >= 6:
-            # prevents endless recursion, stops after 6 iterations (arbitrary choice)...if no results found after 6, something is wrong
-            print('\nError! No csv results found in 6 most recent containers. Terminating search...')
-            return None
-        else:
-            # recursive call for if no .csv is found in results object...increments depth and tries again
-            print('\nNo results csv found. Checking next container...')
-            result_csvs += fetch_results_csv(phantom_id, depth=depth+1)
-    # returns array of URL(s) of CSV(s) w/ scrape results
+                if found == count:
+                    return result_csvs
+    if not result_csvs:
+        # if no results found in the newest containers, something is wrong
+        print(f'\nError! No csv results found in {len(containers)} most recent containers. Terminating search...')
+        return None
     return result_csvs
 
 # Testing...
 
-ACCOUNT = get_user_info()
+# ACCOUNT = get_user_info()
 # ACCOUNT.print_all_phantoms()
 
 # camps_phantom_id = ACCOUNT.get_phantom_id('camps')
-det_id = ACCOUNT.get_phantom_id('det')
+# det_id = ACCOUNT.get_phantom_id('det')
 # print(fetch_phantom(camps_phantom_id))
 # camps_csv = fetch_results_csv(camps_phantom_id)
 # print(camps_csv)
@@ -0,0 +1,117 @@
+"""
+Rate limiting helpers for API calls (Hunter, Phantombuster). Token buckets are thread-safe so one limiter
+can be shared by every worker in a thread pool. Hunter limits (per their API docs):
+Domain Search = 15 req/s + 500 req/min, Email Verifier = 10 req/s + 300 req/min. Monthly limits depend on plan:
+the Hunter limiters read the credits left from the account on first use and stop with QuotaExceeded at zero.
+"""
+
+import threading
+import random
+import time
+
+
+class QuotaExceeded(Exception):
+    """raised when a limiter's monthly (plan) credits have been used up"""
+
+
+class TokenBucket:
+    """classic token bucket. refills at `rate` tokens per second up to `capacity` (max burst)"""
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity or rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, tokens=1):
+        """blocks until `tokens` are available (and any pause is over), then takes them"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                if now < self.blocked_until:
+                    wait = self.blocked_until - now
+                else:
+                    self._refill()
+                    if self.tokens >= tokens:
+                        self.tokens -= tokens
+                        return
+                    wait = (tokens - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        """blocks every worker for ~`seconds` (used when the API answers 429). overlapping pauses don't add up:
+           the later deadline wins, and the bucket refills from empty once it passes"""
+        with self.lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+            self.tokens = 0.0
+            self.updated = self.blocked_until
+
+
+class RateLimiter:
+    """combines per-second + per-minute buckets with an optional plan quota. `credits` is the number of requests left
+       this month, or a function returning it (see hunter_credits). it's read on first use and counted down from there"""
+    def __init__(self, per_second, per_minute=None, credits=None):
+        self.buckets = [TokenBucket(per_second)]
+        if per_minute:
+            self.buckets.append(TokenBucket(per_minute/60, capacity=per_minute))
+        self.credits = credits
+        self.remaining = None
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        with self.lock:
+            if self.credits is not None:
+                self.remaining = self.credits() if callable(self.credits) else self.credits
+                self.credits = None # read once per process
+            if self.remaining is not None:
+                if self.remaining <= 0:
+                    raise QuotaExceeded('\nError! No API credits left for this month.')
+                self.remaining -= 1
+        for bucket in self.buckets:
+            bucket.acquire()
+
+    def pause(self, seconds):
+        for bucket in self.buckets:
+            bucket.pause(seconds)
+
+
+def backoff_delay(attempt, retry_after=None, base=1.0, cap=60.0):
+    """seconds to wait before retry # attempt. honors Retry-After header if the server sent one,
+       otherwise exponential backoff w/ jitter"""
+    if retry_after:
+        try:
+            return min(float(retry_after), cap)
+        except ValueError:
+            pass
+    return min(cap, base * 2**attempt) * random.uniform(0.5, 1.0)
+
+
+HUNTER_ACCOUNT_URL = 'https://api.hunter.io/v2/account'
+
+def hunter_credits(kind):
+    """credits loader for a Hunter limiter: requests of `kind` ('searches' or 'verifications') left on the plan this
+       month, from Hunter's /v2/account. falls back to config.HUNTER_CREDITS[kind] if the account can't be read,
+       and to no quota at all if that isn't set either"""
+    def load():
+        import http_client # imported here since http_client imports this module
+        import config
+        try:
+            response = http_client.get(HUNTER_ACCOUNT_URL, {'api_key': config.HUNTER_API})
+            response.raise_for_status()
+            usage = response.json()['data']['requests'][kind]
+            return usage['available'] - usage['used']
+        except Exception as e:
+            print(f'\nCould not read Hunter {kind} credits ({e}).')
+            return getattr(config, 'HUNTER_CREDITS', {}).get(kind)
+    return load
+
+
+# shared limiters, one per Hunter endpoint family
+HUNTER_DOMAIN_SEARCH_LIMITER = RateLimiter(per_second=15, per_minute=500, credits=hunter_credits('searches'))
+HUNTER_VERIFIER_LIMITER = RateLimiter(per_second=10, per_minute=300, credits=hunter_credits('verifications'))
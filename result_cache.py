@@ -0,0 +1,107 @@
+"""
+Local content-addressed cache of Phantombuster result CSVs. Each download is streamed to disk under
+cache/results/{sha256}.csv and the url -> hash mapping is kept in SQLite along with the response's ETag /
+Last-Modified. A cached url is revalidated with a conditional GET, so an unchanged result CSV costs a 304 instead of
+a download, while a Phantom that re-ran and overwrote its result file is downloaded again. If the server can't be
+reached or the url has expired, the local copy is used. Identical files fetched from different urls share one copy.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from lazy_sqlite import LazyConnection
+import http_client
+import requests
+import threading
+import hashlib
+import time
+import os
+
+RESULTS_DIR = 'cache/results'
+
+
+class ResultCache:
+    """url -> local CSV path. safe to share between threads"""
+    def __init__(self, root=RESULTS_DIR):
+        self.root = root
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.db = LazyConnection(os.path.join(root, 'index.db'), '''CREATE TABLE IF NOT EXISTS results (url TEXT PRIMARY KEY, sha256 TEXT NOT NULL,
+                                 size INTEGER NOT NULL, fetched_at REAL NOT NULL, etag TEXT, last_modified TEXT)''')
+
+    @property
+    def conn(self):
+        return self.db.get()
+
+    def __str__(self):
+        return f'\nResult cache: {self.hits} local copies reused / {self.misses} downloads'
+
+    def _path(self, sha256):
+        return os.path.join(self.root, f'{sha256}.csv')
+
+    def lookup(self, url):
+        """(local path, etag, last_modified) of url's last download if the file is still intact, otherwise None"""
+        with self.lock:
+            row = self.conn.execute('SELECT sha256, size, etag, last_modified FROM results WHERE url = ?', (url,)).fetchone()
+        if row and os.path.exists(self._path(row[0])) and os.path.getsize(self._path(row[0])) == row[1]:
+            return self._path(row[0]), row[2], row[3]
+        return None
+
+    def _download(self, url, response):
+        """streams response to a temp file while hashing it, then moves it to its content address"""
+        digest = hashlib.sha256()
+        tmp_path = os.path.join(self.root, f'.{threading.get_ident()}-{time.time_ns()}.part')
+        size = 0
+        try:
+            with open(tmp_path, 'wb') as f:
+                for block in response.iter_content(1 << 20):
+                    digest.update(block)
+                    f.write(block)
+                    size += len(block)
+            sha256 = digest.hexdigest()
+            os.replace(tmp_path, self._path(sha256))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        with self.lock, self.conn:
+            self.conn.execute('INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?)',
+                              (url, sha256, size, time.time(), response.headers.get('ETag'), response.headers.get('Last-Modified')))
+        return self._path(sha256)
+
+    def fetch(self, url):
+        """local path of url's CSV. a cached copy is reused if the server confirms it's unchanged (304), and also if
+           the server can't be reached or answers with an error (e.g. 403/404 once a result link expires), so
+           re-parsing a session works offline. otherwise the current file is downloaded"""
+        cached = self.lookup(url)
+        headers = {}
+        if cached and cached[1]:
+            headers['If-None-Match'] = cached[1]
+        if cached and cached[2]:
+            headers['If-Modified-Since'] = cached[2]
+        try:
+            with http_client.get(url, stream=True, headers=headers) as response:
+                if cached and response.status_code == 304:
+                    return self._hit(cached[0])
+                response.raise_for_status()
+                path = self._download(url, response)
+        except requests.exceptions.RequestException as e:
+            if not cached:
+                raise
+            print(f'\nCould not fetch {url} ({e}). Using the local copy.')
+            return self._hit(cached[0])
+        with self.lock:
+            self.misses += 1
+        return path
+
+    def _hit(self, path):
+        with self.lock:
+            self.hits += 1
+        return path
+
+    def fetch_many(self, urls, workers=4):
+        """local paths for urls (same order), downloaded or revalidated in parallel"""
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(self.fetch, urls))
+
+
+RESULT_CACHE = ResultCache()
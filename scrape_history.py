@@ -0,0 +1,99 @@
+"""
+Index of every (city, state, term) already sent to Phantombuster (SQLite, cache/scrape_history.db). A search URL CSV
+is recorded with its date when a Phantom is launched on it (launch_sharded_scrape, or the single Phantom launch in
+cold_out), so CSVs that were written but never launched don't count. Sweeps launched before that are backfilled with
+their real scrape dates by running this file directly. get_list_of_search_urls checks the history so a new sweep can
+skip, or push to the back, cities that were scraped for the same term recently instead of paying Phantombuster to
+scrape them again.
+"""
+
+from lazy_sqlite import LazyConnection
+from city_table import get_city_table
+import pyinputplus as pyip
+import threading
+import datetime
+import csv
+import re
+import os
+
+HISTORY_PATH = 'cache/scrape_history.db'
+SEARCH_URLS_DIR = 'search_urls'
+DEFAULT_WINDOW_DAYS = 180
+MINUTES_PER_SEARCH_URL = 1.5 # rough Phantombuster Maps extractor time per search url, for the time-saved report
+
+_COORDS_RE = re.compile(r'/@(-?\d+(?:\.\d+)?),(-?\d+(?:\.\d+)?),')
+
+
+def normalize_term(term):
+    return ' '.join(str(term).lower().split())
+
+
+class ScrapeHistory:
+    """SQLite-backed history. safe to share between threads"""
+    def __init__(self, path=HISTORY_PATH):
+        self.lock = threading.Lock()
+        self.db = LazyConnection(path, '''CREATE TABLE IF NOT EXISTS scraped (city TEXT NOT NULL, state TEXT NOT NULL, term TEXT NOT NULL,
+                                           scraped_on TEXT NOT NULL, source TEXT NOT NULL)''',
+                                 'CREATE INDEX IF NOT EXISTS scraped_term ON scraped (term, scraped_on)')
+
+    @property
+    def conn(self):
+        return self.db.get()
+
+    def _read_csv(self, path):
+        """(city, state, term) rows of a search url CSV. column order varies between old files, so columns are
+           read by header name; the state comes from the url's lat/lng (matched against uscities)"""
+        table = get_city_table()
+        states = dict(zip(zip(table.lat.round(4).tolist(), table.lng.round(4).tolist()), table.state_id.tolist()))
+        rows = []
+        with open(path, newline='') as f:
+            for row in csv.DictReader(f):
+                match = _COORDS_RE.search(row.get('url') or '')
+                state = states.get((round(float(match.group(1)), 4), round(float(match.group(2)), 4))) if match else None
+                if state and row.get('city') and row.get('term'):
+                    rows.append((row['city'].lower(), state, normalize_term(row['term'])))
+        return rows
+
+    def record(self, csv_file, scraped_on=None):
+        """records every search in csv_file as scraped on scraped_on (a date, default today). call it once a Phantom
+           was launched on the file. recording the same file again replaces its earlier entries. returns # of searches"""
+        scraped_on = (scraped_on or datetime.date.today()).isoformat()
+        rows = self._read_csv(csv_file)
+        with self.lock, self.conn:
+            self.conn.execute('DELETE FROM scraped WHERE source = ?', (csv_file,))
+            self.conn.executemany('INSERT INTO scraped VALUES (?, ?, ?, ?, ?)',
+                                  [(city, state, term, scraped_on, csv_file) for city, state, term in rows])
+        return len(rows)
+
+    def recorded(self):
+        """csv files with recorded scrapes"""
+        with self.lock:
+            return {source for (source,) in self.conn.execute('SELECT DISTINCT source FROM scraped')}
+
+    def recent(self, term, window_days=DEFAULT_WINDOW_DAYS):
+        """{(city lowercased, state_id): last scraped date} for term within the last window_days"""
+        since = (datetime.date.today() - datetime.timedelta(days=window_days)).isoformat()
+        with self.lock:
+            rows = self.conn.execute('''SELECT city, state, MAX(scraped_on) FROM scraped WHERE term = ? AND scraped_on >= ?
+                                        GROUP BY city, state''', (normalize_term(term), since))
+            return {(city, state): scraped_on for city, state, scraped_on in rows}
+
+SCRAPE_HISTORY = ScrapeHistory()
+
+
+def import_past_sweeps(search_urls_dir=SEARCH_URLS_DIR, history=SCRAPE_HISTORY):
+    """backfills sweeps launched before scrapes were recorded: asks for the scrape date of every csv in
+       search_urls/ that isn't in the history yet (blank skips it). file dates aren't used, they don't survive a
+       clone or checkout. run directly: python scrape_history.py"""
+    files = sorted(os.path.join(search_urls_dir, name) for name in os.listdir(search_urls_dir) if name.endswith('.csv'))
+    recorded = history.recorded()
+    to_import = [path for path in files if path not in recorded]
+    print(f'\n{len(to_import)} search url files have no recorded scrape.')
+    for path in to_import:
+        scraped_on = pyip.inputDate(f'\nDate {path} was scraped (YYYY-MM-DD), blank to skip:\n', formats=['%Y-%m-%d'], blank=True)
+        if scraped_on:
+            print(f'Recorded {history.record(path, scraped_on)} searches.')
+
+
+if __name__ == '__main__':
+    import_past_sweeps()
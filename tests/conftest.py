@@ -0,0 +1,11 @@
+import importlib.util
+import types
+import sys
+import os
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# config.py holds the real API keys and isn't committed. tests never reach the APIs, placeholder keys are enough
+if importlib.util.find_spec('config') is None:
+    sys.modules['config'] = types.SimpleNamespace(HUNTER_API='test-hunter-key', PHANTOMBUSTER_API='test-pb-key')
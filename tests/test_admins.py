@@ -0,0 +1,42 @@
+import types
+import numpy as np
+import admins
+from admins import Admin
+
+CITIES = {('Austin', 'TX'): (30.27, -97.74), ('Dallas', 'TX'): (32.78, -96.80)}
+
+
+def _admin(first_name, last_name, city, state='TX'):
+    slug = f'{first_name}{last_name}'.lower()
+    return Admin(first_name=first_name, last_name=last_name, slug=slug, email=f'{slug}@example.com',
+                 city=city, state=state, store_code='TX1')
+
+
+def test_allocation_does_not_depend_on_admin_order(monkeypatch):
+    monkeypatch.setattr(admins, 'get_geo_index', lambda: types.SimpleNamespace(coords=lambda city, state: CITIES.get((city, state))))
+    team = [_admin('Jane', 'Doe', 'Austin'), _admin('Ann', 'Lee', 'Austin'), _admin('Tom', 'Ray', 'Dallas')]
+    points = np.array([CITIES[('Austin', 'TX')]] * 3 + [CITIES[('Dallas', 'TX')]] * 2, dtype=float)
+
+    def allocate(order):
+        ordered = [team[i] for i in order]
+        located, unlocated = admins.allocate_accounts(points, ordered, unlocated=4)
+        return [ordered[i].email for i in located], [ordered[i].email for i in unlocated]
+
+    first = allocate([0, 1, 2])
+    for order in ([2, 1, 0], [1, 2, 0], [0, 2, 1]):
+        assert allocate(order) == first
+    assert first[0][:3] == ['janedoe@example.com', 'annlee@example.com', 'janedoe@example.com'] # Doe before Lee on ties
+
+
+def test_blank_cells_in_admin_info(tmp_path, monkeypatch):
+    """a blank city or state is None and a blank daily_send_cap falls back to the default"""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'admin_info.csv').write_text(
+        'first_name,last_name,slug,email,city,state,store_code,daily_send_cap\n'
+        'Jane,Doe,jane,jane@example.com,,TX,TX1,\n'
+        'Tom,Ray,tom,tom@example.com,Dallas,TX,TX2,80\n')
+
+    jane, tom = admins.get_admins(exclude_RM=True)
+    assert (jane.city, jane.state, jane.send_cap) == (None, 'TX', admins.DAILY_SEND_CAP)
+    assert (tom.city, tom.send_cap) == ('Dallas', 80)
+    assert admins.get_admin('jane@example.com') == jane
@@ -0,0 +1,57 @@
+import subprocess
+import datetime
+import sys
+import os
+import pandas as pd
+from pydantic import BaseModel
+from checkpoints import content_hash
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HASH_INPUTS = '''
+from pydantic import BaseModel
+import pandas as pd
+import datetime
+import checkpoints
+
+class Owner(BaseModel):
+    first_name: str
+    last_name: str
+    city: str | None = None
+    state: str | None = None
+
+class Lead(BaseModel):
+    email: str
+    confidence: int | None = None
+    owner: Owner
+    seen: datetime.date | None = None
+
+leads = [Lead(email='bob@acme.com', confidence=90, owner=Owner(first_name='Jane', last_name='Doe', state='TX'),
+              seen=datetime.date(2022, 10, 1))]
+frame = pd.DataFrame({'name': ['Acme Dental', 'Bolt Plumbing'], 'rating': [4.5, None], 'reviews': [12, 3]})
+print(checkpoints.content_hash(leads, 'tag', frame))
+'''
+
+
+def test_hash_is_stable_across_processes(tmp_path):
+    """each python process gets its own string hash seed, so set-ordered state (e.g. a model's __fields_set__)
+       must not leak into the hash -- otherwise a re-run never finds its checkpoints"""
+    hashes = set()
+    for seed in ['1', '2', '3']:
+        env = dict(os.environ, PYTHONHASHSEED=seed, PYTHONPATH=ROOT)
+        result = subprocess.run([sys.executable, '-c', HASH_INPUTS], cwd=tmp_path, env=env, capture_output=True, text=True, check=True)
+        hashes.add(result.stdout.strip())
+    assert len(hashes) == 1
+
+
+def test_hash_follows_content():
+    class Lead(BaseModel):
+        email: str
+        confidence: int | None = None
+
+    frame = pd.DataFrame({'name': ['Acme Dental'], 'reviews': [12]})
+    assert content_hash([Lead(email='bob@acme.com')]) == content_hash([Lead(email='bob@acme.com')])
+    assert content_hash([Lead(email='bob@acme.com')]) != content_hash([Lead(email='bob@acme.com', confidence=90)])
+    assert content_hash(frame) == content_hash(frame.copy())
+    assert content_hash(frame) != content_hash(frame.assign(reviews=[13]))
+    assert content_hash(datetime.date(2022, 10, 1)) != content_hash(datetime.date(2022, 10, 2))
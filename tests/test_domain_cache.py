@@ -0,0 +1,26 @@
+import importlib
+from domain_cache import DomainCache, cache_key
+
+
+def test_domainless_companies_get_their_own_entries(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path) # module-level caches of hunter_domain_search's imports live under cwd
+    hunter_domain_search = importlib.import_module('hunter_domain_search')
+    searched = []
+    def fake_search(domain, company=None, **kwargs):
+        searched.append((domain, company))
+        return {'domain': domain, 'organization': company, 'emails': []}
+    monkeypatch.setattr(hunter_domain_search, 'domain_search', fake_search)
+    cache = DomainCache(str(tmp_path / 'domain_search.db'))
+
+    acme = hunter_domain_search.cached_domain_search('', 'Acme Dental', cache=cache)
+    bolt = hunter_domain_search.cached_domain_search('', 'Bolt Plumbing', cache=cache)
+    assert acme['organization'] == 'Acme Dental'
+    assert bolt['organization'] == 'Bolt Plumbing'
+    assert hunter_domain_search.cached_domain_search('', 'acme  dental', cache=cache) == acme # served from the cache
+    assert searched == [('', 'Acme Dental'), ('', 'Bolt Plumbing')]
+
+
+def test_cache_key():
+    assert cache_key('https://www.Foo.com/about') == 'foo.com'
+    assert cache_key('', 'Acme Dental') == 'company:acme dental'
+    assert cache_key(None, None) is None
@@ -0,0 +1,30 @@
+import types
+import io
+import time
+import requests
+import http_client
+from rate_limit import RateLimiter
+
+
+def _response(status, headers=None):
+    response = requests.Response()
+    response.status_code = status
+    response.raw = io.BytesIO(b'')
+    response.headers.update(headers or {})
+    return response
+
+
+def test_429_waits_retry_after_once(monkeypatch):
+    """a 429 pauses the shared limiter for Retry-After seconds; the caller must not also sleep on top of that"""
+    responses = [_response(429, {'Retry-After': '0.5'}), _response(200)]
+    monkeypatch.setattr(http_client.session, 'request', lambda *args, **kwargs: responses.pop(0))
+    sleeps = [] # sleeps by http_client itself (the limiter keeps the real time module)
+    monkeypatch.setattr(http_client, 'time', types.SimpleNamespace(perf_counter=time.perf_counter,
+                                                                   sleep=lambda seconds: sleeps.append(seconds) or time.sleep(seconds)))
+    limiter = RateLimiter(per_second=100)
+    start = time.monotonic()
+    response = http_client.get('https://api.example.com/v2/thing', limiter=limiter)
+    elapsed = time.monotonic() - start
+    assert response.status_code == 200
+    assert 0.45 <= elapsed < 0.8
+    assert sleeps == [] # the wait happened once, inside limiter.acquire()
@@ -0,0 +1,37 @@
+import importlib
+import types
+from lead_journal import LeadJournal
+
+
+def test_lead_is_pending_during_the_post(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    hunter_leads = importlib.import_module('hunter_leads')
+    journal = LeadJournal(str(tmp_path / 'journal.db'))
+    seen = []
+    def fake_create_lead(lead, list_id, **kwargs):
+        seen.append(journal.pending('test'))
+        return 101
+    monkeypatch.setattr(hunter_leads, 'create_lead', fake_create_lead)
+    monkeypatch.setattr(hunter_leads, 'get_lead_list_ids', lambda tag: 7)
+    owner = types.SimpleNamespace(email='jane@example.com')
+    lead = types.SimpleNamespace(email='bob@acme.com', account=types.SimpleNamespace(owner=owner))
+
+    hunter_leads.bulk_lead_create('test', [lead], ADMINS=[types.SimpleNamespace(slug='jane')], journal=journal)
+    assert seen == [{'bob@acme.com': 7}]
+    assert journal.created('test') == {'bob@acme.com': 101}
+    assert journal.pending('test') == {}
+
+
+def test_reconcile_pending_against_the_lead_list(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    hunter_leads = importlib.import_module('hunter_leads')
+    journal = LeadJournal(str(tmp_path / 'journal.db'))
+    journal.begin('test', 'made-it@acme.com', 7) # POST went through, crash before it was recorded
+    journal.begin('test', 'lost@acme.com', 7) # crash before the POST
+    monkeypatch.setattr(hunter_leads.paginator, 'iter_items',
+                        lambda url, params, key, limit=100: iter([{'email': 'made-it@acme.com', 'id': 55}]))
+
+    assert hunter_leads.reconcile_pending('test', journal) == 1
+    assert journal.created('test') == {'made-it@acme.com': 55}
+    assert journal.pending('test') == {} # lost@ is sent again by the resumed upload
+
@@ -0,0 +1,50 @@
+from concurrent.futures import ThreadPoolExecutor
+import importlib
+import time
+import pytest
+import requests
+import http_client
+from rate_limit import RateLimiter, QuotaExceeded, hunter_credits
+
+
+def test_concurrent_pauses_do_not_add_up():
+    """8 workers hitting a 429 with Retry-After: 1 at once must stall the limiter ~1s, not 8s"""
+    limiter = RateLimiter(per_second=100, per_minute=6000)
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(limiter.pause, [1.0] * 8))
+    start = time.monotonic()
+    limiter.acquire()
+    assert 0.9 <= time.monotonic() - start < 1.5
+
+
+def test_credits_are_counted_down():
+    limiter = RateLimiter(per_second=100, credits=2)
+    limiter.acquire()
+    limiter.acquire()
+    with pytest.raises(QuotaExceeded):
+        limiter.acquire()
+
+
+def _account_response(used, available):
+    response = requests.Response()
+    response.status_code = 200
+    response._content = (b'{"data": {"requests": {"searches": {"used": %d, "available": %d}, '
+                         b'"verifications": {"used": 0, "available": 50}}}}' % (used, available))
+    return response
+
+
+def test_credits_are_read_from_the_hunter_account(monkeypatch):
+    calls = []
+    monkeypatch.setattr(http_client, 'get', lambda url, params=None, **kwargs: calls.append(url) or _account_response(499, 500))
+    limiter = RateLimiter(per_second=100, credits=hunter_credits('searches'))
+    limiter.acquire()
+    with pytest.raises(QuotaExceeded):
+        limiter.acquire()
+    assert calls == ['https://api.hunter.io/v2/account'] # read once, then counted locally
+
+
+def test_verify_email_stops_on_quota(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    hunter_leads = importlib.import_module('hunter_leads')
+    with pytest.raises(QuotaExceeded):
+        hunter_leads.verify_email('bob@acme.com', limiter=RateLimiter(per_second=100, credits=0))
@@ -0,0 +1,90 @@
+import io
+import requests
+import pytest
+import result_cache
+from result_cache import ResultCache
+
+URL = 'https://phantombuster.s3.amazonaws.com/abc/result.csv'
+
+
+def _response(status, body=b'', etag=None):
+    response = requests.Response()
+    response.status_code = status
+    response.raw = io.BytesIO(body)
+    if etag:
+        response.headers['ETag'] = etag
+    return response
+
+
+class FakeServer:
+    """serves one file with an ETag, answering 304 to a matching If-None-Match"""
+    def __init__(self, body, etag):
+        self.body, self.etag = body, etag
+        self.requests = []
+
+    def get(self, url, stream=False, headers=None):
+        self.requests.append(dict(headers or {}))
+        if (headers or {}).get('If-None-Match') == self.etag:
+            return _response(304)
+        return _response(200, self.body, self.etag)
+
+
+def test_cached_copy_is_revalidated(tmp_path, monkeypatch):
+    server = FakeServer(b'name,url\nAcme,acme.com\n', '"v1"')
+    monkeypatch.setattr(result_cache.http_client, 'get', server.get)
+    cache = ResultCache(str(tmp_path / 'results'))
+
+    first = cache.fetch(URL)
+    assert cache.fetch(URL) == first # unchanged: 304, no download
+    assert server.requests[1] == {'If-None-Match': '"v1"'}
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    server.body, server.etag = b'name,url\nBolt,bolt.com\n', '"v2"' # the phantom ran again and overwrote its result
+    second = cache.fetch(URL)
+    assert second != first
+    assert open(second, 'rb').read() == b'name,url\nBolt,bolt.com\n'
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_failed_download_leaves_no_temp_file(tmp_path, monkeypatch):
+    def broken_get(url, stream=False, headers=None):
+        response = _response(200, etag='"v1"')
+        def iter_content(chunk_size):
+            yield b'name,url\n'
+            raise requests.exceptions.ChunkedEncodingError('connection dropped')
+        response.iter_content = iter_content
+        return response
+    monkeypatch.setattr(result_cache.http_client, 'get', broken_get)
+    cache = ResultCache(str(tmp_path / 'results'))
+
+    with pytest.raises(requests.exceptions.ChunkedEncodingError):
+        cache.fetch(URL)
+    assert [p.name for p in (tmp_path / 'results').iterdir()] == ['index.db']
+    assert cache.lookup(URL) is None
+
+
+def test_cache_is_opened_on_first_use(tmp_path):
+    ResultCache(str(tmp_path / 'results'))
+    assert not (tmp_path / 'results').exists()
+
+
+@pytest.mark.parametrize('failure', [requests.exceptions.ConnectionError('network down'), _response(403), _response(404)])
+def test_local_copy_is_used_when_the_url_fails(tmp_path, monkeypatch, failure):
+    server = FakeServer(b'name,url\nAcme,acme.com\n', '"v1"')
+    monkeypatch.setattr(result_cache.http_client, 'get', server.get)
+    cache = ResultCache(str(tmp_path / 'results'))
+    path = cache.fetch(URL)
+
+    def failing_get(url, stream=False, headers=None):
+        if isinstance(failure, Exception):
+            raise failure
+        return failure
+    monkeypatch.setattr(result_cache.http_client, 'get', failing_get)
+    assert cache.fetch(URL) == path
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_failure_without_a_local_copy_raises(tmp_path, monkeypatch):
+    monkeypatch.setattr(result_cache.http_client, 'get', lambda url, stream=False, headers=None: _response(404))
+    with pytest.raises(requests.exceptions.HTTPError):
+        ResultCache(str(tmp_path / 'results')).fetch(URL)
@@ -0,0 +1,49 @@
+import datetime
+import types
+import pandas as pd
+import scrape_history
+from scrape_history import ScrapeHistory
+
+CITIES = types.SimpleNamespace(lat=pd.Series([30.2672, 32.7792]), lng=pd.Series([-97.7431, -96.8089]), state_id=pd.Series(['TX', 'TX']))
+
+
+def _write_urls(path, city, lat, lng, term):
+    path.write_text(f'url,city,term\n"https://www.google.com/maps/search/{term}/@{lat},{lng},12z",{city},{term}\n')
+
+
+def test_only_recorded_launches_count(tmp_path, monkeypatch):
+    monkeypatch.setattr(scrape_history, 'get_city_table', lambda: CITIES)
+    urls_dir = tmp_path / 'search_urls'
+    urls_dir.mkdir()
+    _write_urls(urls_dir / 'austin_urls.csv', 'Austin', 30.2672, -97.7431, 'dentist')
+    _write_urls(urls_dir / 'dallas_urls.csv', 'Dallas', 32.7792, -96.8089, 'dentist') # written, never launched
+    history = ScrapeHistory(str(tmp_path / 'history.db'))
+    launched_on = datetime.date.today() - datetime.timedelta(days=3)
+
+    assert history.record(str(urls_dir / 'austin_urls.csv'), launched_on) == 1
+    assert history.recent('Dentist') == {('austin', 'TX'): launched_on.isoformat()} # file mtime is today, the launch wasn't
+    assert history.recent('dentist', window_days=2) == {}
+
+
+def test_history_is_opened_on_first_use(tmp_path):
+    history = ScrapeHistory(str(tmp_path / 'cache' / 'history.db'))
+    assert not (tmp_path / 'cache').exists()
+    assert history.recent('dentist') == {}
+    assert (tmp_path / 'cache' / 'history.db').exists()
+
+
+def test_past_sweeps_are_imported_with_their_scrape_date(tmp_path, monkeypatch):
+    monkeypatch.setattr(scrape_history, 'get_city_table', lambda: CITIES)
+    urls_dir = tmp_path / 'search_urls'
+    urls_dir.mkdir()
+    _write_urls(urls_dir / 'austin_urls.csv', 'Austin', 30.2672, -97.7431, 'dentist')
+    _write_urls(urls_dir / 'dallas_urls.csv', 'Dallas', 32.7792, -96.8089, 'dentist')
+    history = ScrapeHistory(str(tmp_path / 'history.db'))
+    history.record(str(urls_dir / 'austin_urls.csv'))
+    scraped_on = datetime.date.today() - datetime.timedelta(days=30)
+    prompts = []
+    monkeypatch.setattr(scrape_history.pyip, 'inputDate', lambda prompt, **kwargs: prompts.append(prompt) or scraped_on)
+
+    scrape_history.import_past_sweeps(str(urls_dir), history)
+    assert len(prompts) == 1 # austin was already recorded
+    assert history.recent('dentist') == {('austin', 'TX'): datetime.date.today().isoformat(), ('dallas', 'TX'): scraped_on.isoformat()}
@@ -0,0 +1,65 @@
+"""
+Persistent store of email verifications (SQLite), shared by every campaign. Keyed by email, stores status, score,
+deliverability result and verification date. Anything verified within VERIFICATION_MAX_AGE_DAYS is trusted
+instead of calling the Hunter Email Verifier again.
+"""
+
+from pydantic import BaseModel
+from lazy_sqlite import LazyConnection
+import threading
+import datetime
+
+CACHE_PATH = 'cache/verifications.db'
+VERIFICATION_MAX_AGE_DAYS = 182 # ~6 months, same freshness window verification_filter has always used
+
+
+class Verification(BaseModel):
+    email: str
+    status: str | None # Hunter verification status (valid, accept_all, invalid...)
+    result: str | None = None # Email Verifier deliverability (deliverable, risky, undeliverable). None if status came from a domain search/lead
+    score: int | None = None
+    date: str # YYYY-MM-DD
+
+
+class VerificationCache:
+    """SQLite-backed verification store. safe to share between threads"""
+    def __init__(self, path=CACHE_PATH, max_age_days=VERIFICATION_MAX_AGE_DAYS):
+        self.max_age_days = max_age_days
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.db = LazyConnection(path, 'CREATE TABLE IF NOT EXISTS verifications (email TEXT PRIMARY KEY, status TEXT, result TEXT, score INTEGER, date TEXT NOT NULL)')
+
+    @property
+    def conn(self):
+        return self.db.get()
+
+    def __str__(self):
+        return f'\nVerification cache: {self.hits} hits / {self.misses} misses'
+
+    def cutoff(self):
+        """oldest verification date (as YYYY-MM-DD string) still considered fresh"""
+        return (datetime.date.today() - datetime.timedelta(days=self.max_age_days)).strftime('%Y-%m-%d')
+
+    def get(self, email):
+        """returns Verification if email was verified within the freshness window, otherwise None"""
+        with self.lock:
+            row = self.conn.execute('SELECT email, status, result, score, date FROM verifications WHERE email = ? AND date > ?',
+                                    (email.strip().lower(), self.cutoff())).fetchone()
+            if row:
+                self.hits += 1
+                return Verification(email=row[0], status=row[1], result=row[2], score=row[3], date=row[4])
+            self.misses += 1
+            return None
+
+    def put(self, email, status, result=None, score=None, date=None):
+        """stores verification. an existing newer verification for the same email is never overwritten by an older one"""
+        date = str(date or datetime.date.today().strftime('%Y-%m-%d'))[:10]
+        with self.lock, self.conn:
+            self.conn.execute('''INSERT INTO verifications VALUES (?, ?, ?, ?, ?)
+                                 ON CONFLICT(email) DO UPDATE SET status=excluded.status, result=excluded.result,
+                                 score=excluded.score, date=excluded.date WHERE excluded.date >= verifications.date''',
+                              (email.strip().lower(), status, result, score, date))
+
+
+VERIFICATION_CACHE = VerificationCache()